@@ -84,7 +84,8 @@ def ask_llama(query, context):
     data = {
         "prompt": f"{initial_prompt}\nContext: {context}\nQuestion: {query}\nAnswer:",
         "max_tokens": 80,  # Limit response length to avoid delays
-        "temperature": 0.7  # Adjust temperature for balanced responses
+        "temperature": 0.7,  # Adjust temperature for balanced responses
+        "stop": ["Question:", "Context:"]  # Stop if the model starts a new turn on its own
     }
     response = requests.post(llama_url, json=data, headers={'Content-Type': 'application/json'})
     if response.status_code == 200:
@@ -1,4 +1,5 @@
-import requests
+import requests, json, os, random, time, argparse
+from concurrent.futures import ThreadPoolExecutor
 from termcolor import colored
 from datetime import datetime
 
@@ -26,7 +27,8 @@ def ask_llama(llama_url, prompt, query):
     data = {
         "prompt": f"{prompt}\nQuestion: {query}\nAnswer:",
         "max_tokens": 82,  # Limiting response to 82 tokens for conciseness
-        "temperature": 0.82  # Adjusting temperature for more varied responses
+        "temperature": 0.82,  # Adjusting temperature for more varied responses
+        "stop": ["Question:"]  # Stop if the model starts writing the other NPC's turn
     }
     # Sending the request to the specified LLaMA server
     response = requests.post(llama_url, json=data, headers={'Content-Type': 'application/json'})
@@ -34,6 +36,31 @@ def ask_llama(llama_url, prompt, query):
         return response.json().get('content', '').strip()
     return f"Error: {response.status_code}"
 
+# Same request as ask_llama, but streamed so each token can be shown as soon as it arrives
+def stream_llama(llama_url, prompt, query, on_token):
+    data = {
+        "prompt": f"{prompt}\nQuestion: {query}\nAnswer:",
+        "n_predict": 82,  # Limiting response to 82 tokens for conciseness
+        "temperature": 0.82,  # Adjusting temperature for more varied responses
+        "stop": ["Question:"],  # Stop if the model starts writing the other NPC's turn
+        "stream": True
+    }
+    text = ""
+    with requests.post(llama_url, json=data, headers={'Content-Type': 'application/json'}, stream=True) as response:
+        if response.status_code != 200:
+            return f"Error: {response.status_code}"
+        for line in response.iter_lines():
+            if not line.startswith(b"data: "):
+                continue
+            chunk = json.loads(line[len(b"data: "):])
+            token = chunk.get("content", "")
+            if token:
+                text += token
+                on_token(token)
+            if chunk.get("stop"):
+                break
+    return text.strip()
+
 # HTML file setup with a dark theme to log the conversation between Gemma and Gemmo
 html_header = """
 <html>
@@ -70,31 +97,114 @@ html_header = """
 color_gemma = "magenta"
 color_gemmo = "cyan"
 
-# Initialize the conversation with an opening question
+# Opening question used when there is no pre-generated opener
 initial_question = "What do you think about the meaning of life?"
-response_gemma = ask_llama(gemma_url, prompt_gemma, initial_question)  # Gemma's response
-
-# Store the initial response in conversation history
-conversation_history = [("Gemma", response_gemma)]
 
-# Generate a filename to log the conversation with a timestamp
-filename = f"./npcs/conversation_log_{datetime.now().strftime('%Y%m%d_%H%M')}.html"
+# Both NPCs: name, server, personality prompt and terminal color
+npcs = {
+    "Gemma": (gemma_url, prompt_gemma, color_gemma),
+    "Gemmo": (gemmo_url, prompt_gemmo, color_gemmo),
+}
 
-# Continuous loop to maintain the conversation between Gemma and Gemmo
-while True:
-    # Gemmo responds to Gemma's previous response
-    response_gemmo = ask_llama(gemmo_url, prompt_gemmo, response_gemma)
-    conversation_history.append(("Gemmo", response_gemmo))  # Add to conversation history
-    print(colored(f"Gemmo: {response_gemmo}", color_gemmo))  # Display response in terminal
-    
-    # Gemma responds back to Gemmo's response
-    response_gemma = ask_llama(gemma_url, prompt_gemma, response_gemmo)
-    conversation_history.append(("Gemma", response_gemma))  # Add to conversation history
-    print(colored(f"Gemma: {response_gemma}", color_gemma))  # Display response in terminal
-    
-    # Write the entire conversation to an HTML file after every interaction
+# Write the entire conversation to an HTML file
+def write_log(filename, conversation_history):
     with open(filename, "w") as file:
         file.write(html_header)  # Write the HTML header
         for speaker, message in conversation_history:
             file.write(f'<div class="{speaker.lower()}">{speaker}: {message}</div>')  # Log each response
         file.write("</body></html>")  # Close HTML body
+
+# Pre-generate openers for both personas at once, one worker per server so both servers work in parallel
+def generate_openers(count):
+    pools = {name: ThreadPoolExecutor(max_workers=1) for name in npcs}
+    try:
+        futures = {name: [pools[name].submit(ask_llama, url, prompt, initial_question) for _ in range(count)]
+                   for name, (url, prompt, _) in npcs.items()}
+        return {name: [f.result() for f in items if not f.result().startswith("Error")]
+                for name, items in futures.items()}
+    finally:
+        for pool in pools.values():
+            pool.shutdown()
+
+# One NPC turn: streamed to the terminal token by token in overlapped mode, printed whole in serial mode
+def npc_turn(speaker, message, streaming):
+    url, prompt, color = npcs[speaker]
+    if not streaming:
+        return ask_llama(url, prompt, message)
+    print(colored(f"{speaker}: ", color), end="", flush=True)
+    reply = stream_llama(url, prompt, message, lambda token: print(colored(token, color), end="", flush=True))
+    print()
+    return reply
+
+# Print how fast the conversation is going
+def report_rate(mode, replies, started):
+    minutes = (time.perf_counter() - started) / 60
+    if replies and minutes:
+        print(colored(f"[{mode}] {replies} exchanges in {minutes * 60:.1f}s = {replies / minutes:.1f} exchanges/min", "yellow"))
+
+# Continuous loop to maintain the conversation between Gemma and Gemmo
+def converse(mode, exchanges, openers, new_topic_every):
+    os.makedirs("./npcs", exist_ok=True)
+    # Generate a filename to log the conversation with a timestamp
+    filename = f"./npcs/conversation_log_{datetime.now().strftime('%Y%m%d_%H%M')}.html"
+    streaming = mode == "overlapped"
+    pool = ThreadPoolExecutor(max_workers=1)  # Runs the next NPC's request while we print and log
+
+    # Start from a pre-generated opener when available, otherwise ask Gemma the initial question
+    speaker, listener = "Gemma", "Gemmo"
+    if openers.get(speaker):
+        message = openers[speaker].pop(random.randrange(len(openers[speaker])))
+        print(colored(f"{speaker}: {message}", npcs[speaker][2]))
+    else:
+        message = npc_turn(speaker, initial_question, streaming)
+        if not streaming:
+            print(colored(f"{speaker}: {message}", npcs[speaker][2]))
+    conversation_history = [(speaker, message)]  # Store the opening in conversation history
+
+    replies = 0
+    started = time.perf_counter()
+    pending = pool.submit(npc_turn, listener, message, streaming) if streaming else None
+    try:
+        while not exchanges or replies < exchanges:
+            speaker, listener = listener, speaker
+            if streaming:
+                message = pending.result()  # Already streamed to the terminal token by token
+            else:
+                message = npc_turn(speaker, message, streaming)
+                print(colored(f"{speaker}: {message}", npcs[speaker][2]))  # Display response in terminal
+            replies += 1
+            conversation_history.append((speaker, message))  # Add to conversation history
+
+            # Occasionally restart from a fresh opener so the dialogue doesn't loop on itself
+            if new_topic_every and replies % new_topic_every == 0 and openers.get(listener):
+                message = openers[listener].pop(random.randrange(len(openers[listener])))
+                speaker, listener = listener, speaker
+                print(colored(f"{speaker}: {message}", npcs[speaker][2]))
+                conversation_history.append((speaker, message))
+
+            if replies % 10 == 0:
+                report_rate(mode, replies, started)  # Before the next turn starts streaming to the terminal
+            if streaming and (not exchanges or replies < exchanges):
+                pending = pool.submit(npc_turn, listener, message, streaming)  # Next turn generates while we log
+            write_log(filename, conversation_history)
+    except KeyboardInterrupt:
+        print()
+    finally:
+        pool.shutdown(wait=False)
+        report_rate(mode, replies, started)
+
+def main():
+    parser = argparse.ArgumentParser(description="Conversation between Gemma and Gemmo on two LLaMA.cpp servers")
+    parser.add_argument("--mode", choices=["serial", "overlapped"], default="overlapped",
+                        help="serial: wait, print, log, repeat; overlapped: stream replies and log while the next one generates")
+    parser.add_argument("--exchanges", type=int, default=0, help="Stop after this many replies (0 = run forever)")
+    parser.add_argument("--openers", type=int, default=0, help="Openers to pre-generate per persona")
+    parser.add_argument("--new-topic-every", type=int, default=0, help="Restart from a fresh opener every N replies")
+    args = parser.parse_args()
+
+    openers = generate_openers(args.openers) if args.openers else {}
+    converse(args.mode, args.exchanges, openers, args.new_topic_every)
+
+# Entry point of the script
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
-import whisper, requests, os, sounddevice as sd, tempfile, wave, time
+import whisper, requests, os, sounddevice as sd, numpy as np, tempfile, wave, time, re, threading, queue
 from TTS.api import TTS  # Coqui TTS for Japanese text-to-speech
 
 # Load Whisper model for English speech-to-text
@@ -22,6 +22,12 @@ bip2_sound = os.path.join(current_dir, "assets/bip2.wav")
 
 # Load Coqui TTS model for Japanese text-to-speech synthesis
 tts = TTS("tts_models/ja/kokoro/tacotron2-DDC")
+tts_sample_rate = tts.synthesizer.output_sample_rate
+tts.tts(text="こんにちは。")  # Warm-up synthesis so the first translation doesn't pay for it
+
+# Japanese sentence punctuation where the translation is split into separately synthesized segments
+segment_boundary = re.compile(r"(?<=[。、！？!?])")
+min_segment_chars = 4  # Shorter pieces are merged into the next one so the voice doesn't sound choppy
 
 # Find the correct audio input device by name (substring match)
 def find_device(device_name_substring):
@@ -59,20 +65,63 @@ def ask_llama(query):
     data = {
         "prompt": f"{initial_prompt}\nQuestion: {query}\nAnswer:",  # Pass the transcribed query
         "max_tokens": 30,  # Limit response length to ensure concise replies
-        "temperature": 0.7  # Adjust temperature for balanced responses
+        "temperature": 0.7,  # Adjust temperature for balanced responses
+        "stop": ["Question:"]  # Stop if the model starts a new turn on its own
     }
     response = requests.post(llama_url, json=data, headers={'Content-Type': 'application/json'})
     if response.status_code == 200:
         return response.json().get('content', '').strip()  # Return the translation
     return f"Error: {response.status_code}"
 
-# Convert translated text to speech using Coqui TTS
+# Split the translation at sentence punctuation (。、), merging pieces that are too short
+def split_segments(text):
+    segments = []
+    pending = ""
+    for part in segment_boundary.split(text):
+        pending += part.strip()
+        if len(pending) >= min_segment_chars:
+            segments.append(pending)
+            pending = ""
+    if pending:
+        if segments:
+            segments[-1] += pending
+        else:
+            segments.append(pending)
+    return segments
+
+# Synthesize segments one after another on a worker thread, handing each finished clip to the player
+def synthesize_segments(segments, clips):
+    try:
+        for segment in segments:
+            clip = np.array(tts.tts(text=segment), dtype=np.float32)
+            clips.put(clip / max(0.01, np.abs(clip).max()))  # Peak-normalize like Coqui's save_wav did
+    except Exception as e:
+        clips.put(e)  # Let the player report it instead of waiting forever
+    finally:
+        clips.put(None)  # No more segments
+
+# Convert translated text to speech using Coqui TTS, playing each segment while the next one is synthesized
 def text_to_speech(text):
     if not text:
         text = "I could not hear anything, please try again."  # Handle case where input is unclear
     print(f"Llama response (translated to Japanese): {text}")  # Log the translation
-    tts.tts_to_file(text=text, file_path="response.wav")  # Save speech as a .wav file
-    os.system("aplay response.wav")  # Play the generated audio
+    start = time.perf_counter()
+    segments = split_segments(text)
+    clips = queue.Queue(maxsize=2)  # Synthesis stays at most a couple of segments ahead of playback
+    threading.Thread(target=synthesize_segments, args=(segments, clips), daemon=True).start()
+    first_audio = None
+    while True:
+        clip = clips.get()
+        if clip is None:
+            break
+        if isinstance(clip, Exception):
+            raise RuntimeError(f"Speech synthesis failed: {clip}") from clip
+        if first_audio is None:
+            first_audio = time.perf_counter() - start
+            print(f"Time to first audio: {first_audio:.2f}s ({len(segments)} segments)")
+        sd.play(clip, tts_sample_rate)  # Play from memory, no response.wav round trip
+        sd.wait()
+    print(f"Speech finished in {time.perf_counter() - start:.2f}s")
 
 # Main loop for the translation assistant
 def main():
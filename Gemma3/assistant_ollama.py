@@ -1,10 +1,16 @@
-import whisper, requests, os, sounddevice as sd, numpy as np, tempfile, wave
+import whisper, requests, os, sounddevice as sd, numpy as np, tempfile, wave, time
 import faiss
-from sentence_transformers import SentenceTransformer
 from config import *
+from audio_input import PersistentInput, find_input_device, record_from_ring
+from audio_ring import AudioRing
+from embeddings import load_embedding_model
+from generation_control import SpokenBudgetController, generate_spoken
+from model_residency import ModelResidencyManager, model_size_mb
+from model_router import ModelRouter
+from semantic_cache import SemanticCache
 
-# Load sentence transformer model for document embeddings
-embedding_model = SentenceTransformer('all-MiniLM-L6-v2')  # Using a smaller, more accessible model
+# Load sentence transformer model for document embeddings (torch or ONNX backend, see EMBEDDING_CONFIG)
+embedding_model = load_embedding_model(EMBEDDING_CONFIG)
 
 # Load Whisper model for speech-to-text
 whisper_model = whisper.load_model(WHISPER_CONFIG["model"])
@@ -27,31 +33,56 @@ class VectorDatabase:
         self.index.add(np.array(embeddings, dtype=np.float32))  # Add them to the FAISS index
         self.documents.extend(docs)
     
+    # Encode a query once so retrieval and the response cache can share the embedding
+    def encode_query(self, query):
+        return embedding_model.encode([query])[0].astype(np.float32)
+
     # Search for the top K most relevant documents based on query embedding
-    def search(self, query, top_k=3):
-        query_embedding = embedding_model.encode([query])[0].astype(np.float32)
+    def search(self, query, top_k=3, query_embedding=None):
+        return self.search_scored(query, top_k, query_embedding)[0]
+
+    # Same as search, also returning the L2 distance of each document
+    def search_scored(self, query, top_k=3, query_embedding=None):
+        if query_embedding is None:
+            query_embedding = self.encode_query(query)
         distances, indices = self.index.search(np.array([query_embedding]), top_k)
-        return [self.documents[i] for i in indices[0]]
+        return [self.documents[i] for i in indices[0]], distances[0]
 
 # Create a VectorDatabase and add documents to it
 db = VectorDatabase(dim=FAISS_CONFIG["dimension"])
 db.add_documents(KNOWLEDGE_DOCS)
 
-# Find the device for audio recording by matching part of the device name
-def find_device(device_name_substring):
-    try:
-        devices = sd.query_devices()
-        for i, device in enumerate(devices):
-            if device['max_inputs'] > 0 and device_name_substring.lower() in device['name'].lower():
-                return i
-        # If specific device not found, use first available input device
-        for i, device in enumerate(devices):
-            if device['max_inputs'] > 0:
-                return i
-        # Fallback to default
-        return sd.default.device[0]
-    except:
-        return None
+# Semantic cache of past answers so paraphrased questions skip the LLM
+response_cache = None
+if CACHE_CONFIG["enabled"]:
+    cache_path = CACHE_CONFIG["path"] and os.path.join(current_dir, CACHE_CONFIG["path"])
+    response_cache = SemanticCache(FAISS_CONFIG["dimension"], threshold=CACHE_CONFIG["threshold"],
+                                   max_entries=CACHE_CONFIG["max_entries"], ttl=CACHE_CONFIG["ttl"],
+                                   path=cache_path)
+
+# Controller that keeps spoken replies to a target duration and tracks token usage
+speech_budget = None
+if SPEECH_BUDGET["enabled"]:
+    speech_budget = SpokenBudgetController(target_seconds=SPEECH_BUDGET["target_seconds"],
+                                           words_per_second=SPEECH_BUDGET["words_per_second"],
+                                           max_tokens=SPEECH_BUDGET["max_tokens"],
+                                           stop=SPEECH_BUDGET["stop"])
+
+# Keep the LLM resident in Ollama and account for every model sharing the Jetson's memory
+residency = None
+if RESIDENCY_CONFIG["enabled"]:
+    residency = ModelResidencyManager(OLLAMA_URL, MODEL_NAME, keep_alive=RESIDENCY_CONFIG["keep_alive"],
+                                      ping_interval=RESIDENCY_CONFIG["ping_interval"],
+                                      memory_budget_mb=RESIDENCY_CONFIG["memory_budget_mb"],
+                                      llm_estimate_mb=RESIDENCY_CONFIG["llm_estimate_mb"])
+    residency.register("whisper", model_size_mb(whisper_model))
+    residency.register("embedding", model_size_mb(embedding_model))
+
+# Route easy questions to the smallest model and harder ones to a larger model
+router = None
+if ROUTER_CONFIG["enabled"]:
+    router = ModelRouter(ROUTER_CONFIG["tiers"], long_query_words=ROUTER_CONFIG["long_query_words"],
+                         min_similarity=ROUTER_CONFIG["min_similarity"])
 
 # Play sound (beep) to signal recording start/stop
 def play_sound(sound_file):
@@ -67,18 +98,25 @@ def play_sound(sound_file):
     else:
         print("Beep!")  # Fallback if sound file doesn't exist
 
+# Input device for the WAV-file path, resolved on the first recording and reused afterwards
+input_device = None
+
 # Record audio using sounddevice, save it as a .wav file
 def record_audio(filename, duration=AUDIO_CONFIG["duration"], fs=AUDIO_CONFIG["sample_rate"]):
-    try:
-        device_id = find_device("920")  # Try to find Logitech 920
-        if device_id is not None:
-            sd.default.device = device_id
-    except:
-        pass  # Use default device if not found
+    global input_device
+    if input_device is None:
+        input_device, _ = find_input_device(AUDIO_CONFIG["device"])  # Logitech 920, else first input (None = default)
     
     play_sound(bip_sound)  # Start beep
-    audio = sd.rec(int(duration * fs), samplerate=fs, channels=1, dtype='int16')
-    sd.wait()  # Wait for the recording to complete
+    try:
+        audio = sd.rec(int(duration * fs), samplerate=fs, channels=1, dtype='int16', device=input_device)
+        sd.wait()  # Wait for the recording to complete
+    except (sd.PortAudioError, ValueError):
+        # The device probably went away: re-read PortAudio's device list and look it up again next turn
+        input_device = None
+        sd._terminate()
+        sd._initialize()
+        raise
     with wave.open(filename, 'wb') as wf:
         wf.setnchannels(1)
         wf.setsampwidth(2)
@@ -86,34 +124,95 @@ def record_audio(filename, duration=AUDIO_CONFIG["duration"], fs=AUDIO_CONFIG["s
         wf.writeframes(audio.tobytes())
     play_sound(bip2_sound)  # End beep
 
-# Transcribe recorded audio to text using Whisper
-def transcribe_audio(filename):
-    return whisper_model.transcribe(filename, language="en")['text']
+# Shared-memory ring the microphone writes into (VAD/ASR/meter processes can attach to it by name),
+# and the one input stream feeding it for the whole session; both are opened by main()
+audio_ring = None
+microphone = None
+
+# Own the ring and feed it from this process, or read the ring an `audio_ring.py capture` process
+# is already feeding, which keeps the audio callback out of this process (and away from Whisper)
+def open_audio_ring():
+    name = AUDIO_CONFIG["ring_name"]
+    try:
+        ring = AudioRing.create(name, seconds=AUDIO_CONFIG["ring_seconds"], sample_rate=AUDIO_CONFIG["sample_rate"])
+    except FileExistsError:
+        ring = AudioRing.attach(name)
+        if ring.sample_rate != AUDIO_CONFIG["sample_rate"]:
+            ring.close()
+            raise RuntimeError(f"Audio ring '{name}' runs at {ring.sample_rate} Hz, Whisper needs {AUDIO_CONFIG['sample_rate']} Hz")
+        print(f"Reading audio from the capture process feeding '{name}'")
+        return ring, None
+    return ring, PersistentInput(ring, device_name=AUDIO_CONFIG["device"],
+                                 rescan_interval=AUDIO_CONFIG["rescan_interval"])
+
+# Record the next utterance from the ring and return it as float32 samples, ready for Whisper
+def record_to_ring(duration=AUDIO_CONFIG["duration"]):
+    before = lambda: play_sound(bip_sound)  # Start beep
+    after = lambda: play_sound(bip2_sound)  # End beep
+    if microphone is None:
+        return record_from_ring(audio_ring, duration, before, after)  # Another process owns the stream
+    return microphone.record(duration, before=before, after=after)
+
+# Transcribe recorded audio to text using Whisper (accepts a WAV path or float32 samples at 16 kHz)
+def transcribe_audio(audio):
+    return whisper_model.transcribe(audio, language="en")['text']
 
 # Send a query and context to Ollama server for completion
-def ask_ollama(query, context):
+def ask_ollama(query, context, model=MODEL_NAME):
     data = {
-        "model": MODEL_NAME,
+        "model": model,
         "prompt": f"{INITIAL_PROMPT}\nContext: {context}\nQuestion: {query}\nAnswer:",
         "stream": False,
         "options": GENERATION_OPTIONS
     }
+    if residency is not None:
+        data["keep_alive"] = RESIDENCY_CONFIG["keep_alive"]
     
     try:
+        if speech_budget is not None:
+            text, _ = generate_spoken(OLLAMA_URL, data, speech_budget)
+            return text
         response = requests.post(OLLAMA_URL, json=data, headers={'Content-Type': 'application/json'})
         if response.status_code == 200:
             return response.json().get('response', '').strip()
         else:
             return f"Error: {response.status_code} - {response.text}"
+    except requests.exceptions.HTTPError as e:
+        return f"Error: {e.response.status_code} - {e.response.text}"
     except requests.exceptions.ConnectionError:
         return "Error: Cannot connect to Ollama server. Make sure Ollama is running with 'ollama serve'"
     except Exception as e:
         return f"Error: {str(e)}"
 
+# Ask the routed model, timing it for the router and falling back to smaller models on errors
+def routed_ask(query, context, model):
+    while model is not None:
+        start = time.perf_counter()
+        response = ask_ollama(query, context, model=model)
+        ok = not response.startswith("Error")
+        router.record(model, time.perf_counter() - start, ok=ok)
+        if ok:
+            return response
+        model = router.fallback(model)
+    return response
+
 # Generate a response using Retrieval-Augmented Generation (RAG)
 def rag_ask(query):
-    context = " ".join(db.search(query))  # Search for related docs in the FAISS index
-    return ask_ollama(query, context)  # Ask Ollama using the retrieved context
+    query_embedding = db.encode_query(query)  # Shared by the response cache and retrieval
+    if response_cache is not None:
+        cached = response_cache.lookup(query_embedding)
+        if cached is not None:
+            return cached["answer"]  # Paraphrase of a past question, reuse its answer
+    docs, distances = db.search_scored(query, query_embedding=query_embedding)  # Search for related docs in the FAISS index
+    context = " ".join(docs)
+    if router is not None:
+        similarity = 1 - float(distances[0]) / 2  # L2 distance between unit vectors -> cosine similarity
+        response = routed_ask(query, context, router.choose(query, similarity))
+    else:
+        response = ask_ollama(query, context)  # Ask Ollama using the retrieved context
+    if response_cache is not None and response and not response.startswith("Error"):
+        response_cache.add(query, query_embedding, response)
+    return response
 
 # Convert text to speech using system TTS
 def text_to_speech(text):
@@ -134,35 +233,65 @@ def text_to_speech(text):
 
 # Main loop for the assistant
 def main():
+    global audio_ring, microphone
     print("Voice Assistant with Ollama + Gemma3n")
     print("Optimized for Jetson Orin Nano")
     print("Press Ctrl+C to exit")
     print("-" * 50)
+
+    if residency is not None:
+        residency.start()  # Load the model now instead of on the first question
+    if AUDIO_CONFIG["ring_buffer"]:
+        audio_ring, microphone = open_audio_ring()
     
     while True:
         try:
-            # Create a temporary .wav file for the recording
-            with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmpfile:
-                record_audio(tmpfile.name)  # Record the audio input
-                transcribed_text = transcribe_audio(tmpfile.name)  # Convert speech to text
-                print(f"You said: {transcribed_text}")
-                
-                if transcribed_text.strip():  # Only process if there's actual text
-                    response = rag_ask(transcribed_text)  # Generate response using RAG and Ollama
-                    print(f"Assistant: {response}")
-                    if response and not response.startswith("Error"):
-                        text_to_speech(response)  # Convert response to speech
-                else:
-                    print("Assistant: I didn't hear anything. Please try again.")
-                
-                # Clean up temporary file
-                os.unlink(tmpfile.name)
+            if audio_ring is not None:
+                audio = record_to_ring()  # Samples stay in shared memory, no WAV round trip
+            else:
+                # Create a temporary .wav file for the recording
+                with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmpfile:
+                    record_audio(tmpfile.name)  # Record the audio input
+                audio = tmpfile.name
+            transcribed_text = transcribe_audio(audio)  # Convert speech to text
+            print(f"You said: {transcribed_text}")
+            
+            if transcribed_text.strip():  # Only process if there's actual text
+                response = rag_ask(transcribed_text)  # Generate response using RAG and Ollama
+                print(f"Assistant: {response}")
+                if response and not response.startswith("Error"):
+                    text_to_speech(response)  # Convert response to speech
+            else:
+                print("Assistant: I didn't hear anything. Please try again.")
+            
+            # Clean up temporary file
+            if audio_ring is None:
+                os.unlink(audio)
                 
         except KeyboardInterrupt:
+            if response_cache is not None:
+                stats = response_cache.stats()
+                print(f"\nResponse cache: {stats['hits']} hits, {stats['misses']} misses "
+                      f"({stats['hit_rate']:.0%} hit rate, {stats['entries']} entries)")
+            if speech_budget is not None:
+                stats = speech_budget.stats()
+                print(f"Generation: {stats['tokens_generated']} tokens over {stats['turns']} turns, "
+                      f"{stats['tokens_wasted']} wasted, {stats['early_stops']} early stops")
+            if router is not None:
+                for model, stats in router.stats().items():
+                    print(f"Model {model}: {stats['requests']} requests, {stats['fallbacks']} fallbacks")
+            if residency is not None:
+                residency.stop()
+            if microphone is not None:
+                microphone.close()
+            if audio_ring is not None:
+                audio = None  # Release the last slice so the shared memory can be unmapped
+                audio_ring.close()
             print("\nGoodbye!")
             break
         except Exception as e:
             print(f"Error: {e}")
+            time.sleep(1)  # Don't spin when the microphone is gone; give it a moment to come back
             continue
 
 # Entry point of the script
@@ -0,0 +1,127 @@
+"""
+Persistent microphone input for the Ollama Voice Assistant
+Resolves the input device once, keeps one PortAudio stream open for the whole session
+feeding the shared audio ring, and re-resolves only when the device disappears or appears
+"""
+
+import time
+
+import sounddevice as sd
+
+
+def find_input_device(device_name_substring):
+    """Index of the first input device whose name contains the substring, else the first input, else None"""
+    devices = sd.query_devices()
+    inputs = [i for i, device in enumerate(devices) if device['max_input_channels'] > 0]
+    for i in inputs:
+        if device_name_substring.lower() in devices[i]['name'].lower():
+            return i, True
+    return (inputs[0] if inputs else None), False
+
+
+def device_signature():
+    """Cheap hot-plug signal: the ALSA sound card list (None where /proc/asound is unavailable)"""
+    try:
+        with open("/proc/asound/cards") as file:
+            return file.read()
+    except OSError:
+        return None
+
+
+def record_from_ring(ring, duration, before=None, after=None):
+    """Samples for the next ``duration`` seconds of a ring that is being fed, as a float32 slice"""
+    if before:
+        before()  # e.g. the start beep, kept out of the recording
+    frames = int(duration * ring.sample_rate)
+    start = ring.position
+    if not ring.wait_until(start + frames, timeout=duration + 2):
+        raise RuntimeError("No audio received from the input device")
+    if after:
+        after()
+    return ring.read(start, frames)[:, 0]
+
+
+class PersistentInput:
+    """One long-lived InputStream writing into an AudioRing, with cached device resolution"""
+
+    def __init__(self, ring, device_name="920", rescan_interval=10.0):
+        self.ring = ring
+        self.device_name = device_name
+        self.rescan_interval = rescan_interval
+        self.device = None        # Cached device index
+        self.preferred = False    # Whether the cached device matched device_name
+        self.stale = False        # PortAudio's device list must be re-read before the next open
+        self.signature = None     # Sound card list at the last scan
+        self.last_check = 0.0
+        self.stream = None
+        self.reopens = 0
+
+    def resolve(self, rescan=False):
+        """Cached device lookup; rescan re-initializes PortAudio so hot-plugged devices show up"""
+        if rescan:
+            self.close()
+            sd._terminate()   # PortAudio only enumerates devices at initialization
+            sd._initialize()
+            self.stale = False
+        if rescan or self.device is None:
+            self.device, self.preferred = find_input_device(self.device_name)
+            self.signature = device_signature()
+            self.last_check = time.monotonic()
+        return self.device
+
+    def devices_changed(self):
+        """Whether a sound card was plugged in or removed since the last scan (checked every rescan_interval)"""
+        if time.monotonic() - self.last_check < self.rescan_interval:
+            return False
+        self.last_check = time.monotonic()
+        signature = device_signature()
+        return signature is not None and signature != self.signature
+
+    def _stream_finished(self):
+        # Called by PortAudio when the stream stops on its own (e.g. the USB device was unplugged)
+        if self.stream is not None:  # Not when close() stopped it
+            self.stale = True
+
+    def ensure_stream(self):
+        """Open the stream if it is not running, re-resolving the device if it went away"""
+        if self.stream is not None and self.stream.active:
+            # While on a fallback device, switch once the card list changes (between turns only)
+            if self.preferred or not self.devices_changed():
+                return self.stream
+            self.stale = True
+        elif self.stream is not None:
+            self.stale = True  # Stream died: the device list is probably stale
+        if self.stale:
+            self.resolve(rescan=True)
+        if self.stream is None:
+            try:
+                self.stream = sd.InputStream(device=self.resolve(), samplerate=self.ring.sample_rate, channels=1,
+                                             dtype='float32', callback=self.ring.callback,
+                                             finished_callback=self._stream_finished)
+                self.stream.start()
+            except (sd.PortAudioError, ValueError):
+                # No usable device right now: re-read PortAudio's device list before the next attempt
+                self.close()
+                self.stale = True
+                self.device = None
+                raise
+            self.reopens += 1
+        return self.stream
+
+    def record(self, duration, before=None, after=None):
+        """Samples for the next ``duration`` seconds, as a float32 slice of the ring"""
+        self.ensure_stream()
+        try:
+            return record_from_ring(self.ring, duration, before, after)
+        except RuntimeError:
+            self.close()
+            self.stale = True  # Re-initialize PortAudio and look the device up again on the next turn
+            raise
+
+    def close(self):
+        stream, self.stream = self.stream, None
+        if stream is not None:
+            try:
+                stream.close()
+            except sd.PortAudioError:
+                pass
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Shared-memory audio ring buffer
+The sounddevice callback writes into it once; VAD, ASR and level-meter consumers in other
+processes attach by name and read slices without copying the audio around
+"""
+
+import argparse
+import sys
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+HEADER_SLOTS = 8  # int64 header: write position, capacity, channels, sample rate, reserved
+HEADER_BYTES = HEADER_SLOTS * 8
+WRITE_POS, CAPACITY, CHANNELS, SAMPLE_RATE = range(4)
+
+
+class AudioRing:
+    """Single-writer, multi-reader ring of float32 frames in shared memory"""
+
+    def __init__(self, shm, owner):
+        self.shm = shm
+        self.owner = owner
+        self.header = np.ndarray((HEADER_SLOTS,), dtype=np.int64, buffer=shm.buf)
+        self.capacity = int(self.header[CAPACITY])
+        self.channels = int(self.header[CHANNELS])
+        self.sample_rate = int(self.header[SAMPLE_RATE])
+        self.data = np.ndarray((self.capacity, self.channels), dtype=np.float32,
+                               buffer=shm.buf, offset=HEADER_BYTES)
+
+    @classmethod
+    def create(cls, name, seconds=30, sample_rate=16000, channels=1):
+        """Allocate the ring (the capture process owns and unlinks it)"""
+        capacity = int(seconds * sample_rate)
+        size = HEADER_BYTES + capacity * channels * 4
+        try:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            existing = cls.attach(name)
+            live = existing.is_live()
+            existing.close()
+            if live:
+                raise FileExistsError(f"Audio ring '{name}' is being written by another process")
+            # Left over from a crashed run, replace it
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        header = np.ndarray((HEADER_SLOTS,), dtype=np.int64, buffer=shm.buf)
+        header[:] = 0
+        header[CAPACITY], header[CHANNELS], header[SAMPLE_RATE] = capacity, channels, sample_rate
+        del header
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        """Open an existing ring from another process"""
+        if sys.version_info >= (3, 13):
+            return cls(shared_memory.SharedMemory(name=name, track=False), owner=False)
+        shm = shared_memory.SharedMemory(name=name)
+        # Before 3.13 the resource tracker would unlink the owner's segment when this reader exits
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return cls(shm, owner=False)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @property
+    def position(self):
+        """Total frames written since creation (monotonic, never wraps)"""
+        return int(self.header[WRITE_POS])
+
+    def write(self, frames):
+        """Append frames; called from the audio callback, so no allocation beyond the copy into shared memory"""
+        total = count = len(frames)
+        if count > self.capacity:
+            frames, count = frames[-self.capacity:], self.capacity  # Only the newest frames fit
+        start = (self.position + total - count) % self.capacity
+        first = min(count, self.capacity - start)
+        self.data[start:start + first] = frames[:first]
+        if first < count:
+            self.data[:count - first] = frames[first:]
+        self.header[WRITE_POS] += total  # Publish only after the samples are in place
+
+    def callback(self, indata, frames, time_info, status):
+        """sounddevice InputStream callback"""
+        self.write(indata)
+
+    def read(self, start, count):
+        """Frames [start, start + count) as a view when contiguous, a copy when the slice wraps.
+
+        Returns None if the writer has already overwritten part of the range. Views alias
+        the ring, so use them before the writer comes around again.
+        """
+        end = start + count
+        if end > self.position:
+            raise ValueError("Requested frames have not been written yet")
+        if start < self.position - self.capacity:
+            return None
+        offset = start % self.capacity
+        if offset + count <= self.capacity:
+            chunk = self.data[offset:offset + count]
+        else:
+            chunk = np.concatenate([self.data[offset:], self.data[:offset + count - self.capacity]])
+        # The writer may have lapped us while we sliced; views are only valid if it has not
+        return chunk if start >= self.position - self.capacity else None
+
+    def latest(self, count):
+        """The most recent ``count`` frames"""
+        count = min(count, self.position, self.capacity)
+        return self.read(self.position - count, count)
+
+    def is_live(self, timeout=0.5):
+        """Whether a writer is currently feeding the ring"""
+        return self.wait_until(self.position + 1, timeout=timeout)
+
+    def wait_until(self, position, timeout=None, poll=0.01):
+        """Block until ``position`` frames have been written"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.position < position:
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(poll)
+        return True
+
+    def close(self):
+        # Drop numpy views before closing, or SharedMemory refuses to release the buffer
+        del self.data, self.header
+        try:
+            self.shm.close()
+        except BufferError:
+            pass  # A caller still holds a slice; the mapping goes away with it
+        if self.owner:
+            self.shm.unlink()
+
+
+# Example consumers that run in their own process and attach by name
+
+def level_meter(name, interval=0.1):
+    """Print the input level in dBFS"""
+    ring = AudioRing.attach(name)
+    window = int(ring.sample_rate * interval)
+    try:
+        while True:
+            ring.wait_until(ring.position + window)
+            frames = ring.latest(window)
+            if frames is None:
+                continue
+            rms = float(np.sqrt(np.mean(np.square(frames))))
+            level = 20 * np.log10(max(rms, 1e-9))
+            print(f"\r{level:6.1f} dBFS {'#' * int(max(0, level + 60))}{' ' * 60}", end="", flush=True)
+    except KeyboardInterrupt:
+        print()
+    finally:
+        ring.close()
+
+
+def vad(name, threshold_db=-40.0, frame_ms=30, hangover_frames=10):
+    """Energy voice activity detector printing speech segments as ring positions"""
+    ring = AudioRing.attach(name)
+    frame = int(ring.sample_rate * frame_ms / 1000)
+    position = ring.position
+    speech_start, silent = None, 0
+    try:
+        while True:
+            ring.wait_until(position + frame)
+            frames = ring.read(position, frame)
+            position += frame
+            if frames is None:
+                position = ring.position  # Fell behind the writer, skip ahead
+                continue
+            level = 20 * np.log10(max(float(np.sqrt(np.mean(np.square(frames)))), 1e-9))
+            if level > threshold_db:
+                speech_start = position - frame if speech_start is None else speech_start
+                silent = 0
+            elif speech_start is not None:
+                silent += 1
+                if silent > hangover_frames:
+                    duration = (position - speech_start) / ring.sample_rate
+                    print(f"Speech at frames {speech_start}-{position} ({duration:.2f}s)")
+                    speech_start, silent = None, 0
+    except KeyboardInterrupt:
+        pass
+    finally:
+        ring.close()
+
+
+def asr(name, model="tiny", language="en", seconds=5):
+    """Transcribe the last few seconds of the ring with Whisper every time that much audio arrives"""
+    import whisper
+    whisper_model = whisper.load_model(model)
+    ring = AudioRing.attach(name)
+    count = int(seconds * ring.sample_rate)
+    try:
+        while True:
+            ring.wait_until(ring.position + count)
+            frames = ring.latest(count)
+            if frames is not None:
+                # Mono float32 at 16 kHz is exactly what Whisper takes, so the view is passed as is
+                text = whisper_model.transcribe(frames[:, 0], language=language)["text"].strip()
+                print(f"Heard: {text}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        ring.close()
+
+
+def capture(name, seconds, sample_rate, device=None):
+    """Own the ring and feed it from the microphone until Ctrl+C"""
+    import sounddevice as sd
+    ring = AudioRing.create(name, seconds=seconds, sample_rate=sample_rate)
+    print(f"Capturing into shared memory '{ring.name}' ({seconds}s ring at {sample_rate} Hz)")
+    try:
+        with sd.InputStream(device=device, samplerate=sample_rate, channels=1, dtype="float32",
+                            callback=ring.callback):
+            while True:
+                time.sleep(1)
+    except KeyboardInterrupt:
+        print()
+    finally:
+        ring.close()
+
+
+def main():
+    from config import AUDIO_CONFIG
+    parser = argparse.ArgumentParser(description="Shared-memory audio ring buffer tools")
+    parser.add_argument("role", choices=["capture", "meter", "vad", "asr"])
+    parser.add_argument("--name", default=AUDIO_CONFIG["ring_name"], help="Shared memory segment name")
+    args = parser.parse_args()
+
+    if args.role == "capture":
+        capture(args.name, AUDIO_CONFIG["ring_seconds"], AUDIO_CONFIG["sample_rate"])
+    elif args.role == "meter":
+        level_meter(args.name)
+    elif args.role == "vad":
+        vad(args.name)
+    else:
+        asr(args.name)
+
+
+if __name__ == "__main__":
+    main()
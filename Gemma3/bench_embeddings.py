@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Embedding backend benchmark
+Compares load time, encode latency and peak memory of the torch and ONNX backends
+"""
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+
+from config import EMBEDDING_CONFIG, KNOWLEDGE_DOCS
+
+QUERIES = [
+    "What is the Jetson Orin Nano?",
+    "How does retrieval augmented generation work?",
+    "Can I run Gemma locally without the cloud?",
+    "Why is edge AI faster than cloud inference?",
+]
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process (ru_maxrss is KB on Linux)"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_worker(backend, quantized, repeats):
+    """Measure one backend in this process and print the result as JSON"""
+    from embeddings import load_embedding_model
+
+    config = dict(EMBEDDING_CONFIG, backend=backend, quantized=quantized)
+    start = time.perf_counter()
+    model = load_embedding_model(config)
+    load_time = time.perf_counter() - start
+
+    model.encode(KNOWLEDGE_DOCS)  # Warm-up
+    latencies = []
+    for _ in range(repeats):
+        for query in QUERIES:
+            start = time.perf_counter()
+            model.encode([query])
+            latencies.append(time.perf_counter() - start)
+    latencies.sort()
+
+    print(json.dumps({
+        "load_s": load_time,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95)] * 1000,
+        "peak_rss_mb": peak_rss_mb(),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark embedding backends")
+    parser.add_argument("--repeats", type=int, default=25, help="Passes over the query set")
+    parser.add_argument("--worker", choices=["torch", "onnx"], help=argparse.SUPPRESS)
+    parser.add_argument("--quantized", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.quantized, args.repeats)
+        return
+
+    print("Embedding Backend Benchmark")
+    print("=" * 50)
+    variants = [("torch", False, "torch fp32"), ("onnx", False, "onnx fp32"), ("onnx", True, "onnx int8")]
+    for backend, quantized, label in variants:
+        # Each backend runs in a fresh process so import time and memory are not shared
+        command = [sys.executable, __file__, "--worker", backend, "--repeats", str(args.repeats)]
+        if quantized:
+            command.append("--quantized")
+        result = subprocess.run(command, capture_output=True, text=True)
+        if result.returncode != 0:
+            print(f"{label:<12} FAILED: {result.stderr.strip().splitlines()[-1] if result.stderr else ''}")
+            continue
+        stats = json.loads(result.stdout.strip().splitlines()[-1])
+        print(f"{label:<12} load {stats['load_s']:6.2f}s  encode p50 {stats['p50_ms']:6.1f}ms  "
+              f"p95 {stats['p95_ms']:6.1f}ms  peak RSS {stats['peak_rss_mb']:7.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Offline end-to-end benchmark for the voice assistant
+Replays a directory of WAV utterances through capture -> Whisper -> retrieval -> LLM -> TTS
+against a stub LLM server, and reports per-stage latency distributions and throughput
+"""
+
+import argparse
+import glob
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+
+import numpy as np
+
+from audio_ring import AudioRing
+from stub_llm_server import StubLLMServer
+
+CALLBACK_FRAMES = 512  # Block size the replay writes into the ring, like an InputStream callback
+
+STAGES = ["capture", "whisper", "retrieval", "llm", "tts", "total"]
+
+FIXTURE_QUESTIONS = [
+    "What is the Jetson Orin Nano?",
+    "How does retrieval augmented generation work?",
+    "Can I run Gemma without an internet connection?",
+    "Which model should I use on a small device?",
+    "Why is local AI more private than the cloud?",
+]
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def summarize(samples):
+    """Latency distribution (seconds) for one stage"""
+    return {
+        "count": len(samples),
+        "mean": sum(samples) / len(samples),
+        "p50": percentile(samples, 0.50),
+        "p95": percentile(samples, 0.95),
+        "max": max(samples),
+    }
+
+
+def generate_fixtures(directory, sample_rate=16000):
+    """Speak the fixture questions into 16 kHz mono WAV files with espeak"""
+    espeak = shutil.which("espeak-ng") or shutil.which("espeak")
+    if not espeak:
+        sys.exit("espeak is needed to generate fixtures: sudo apt-get install espeak")
+    os.makedirs(directory, exist_ok=True)
+    for i, question in enumerate(FIXTURE_QUESTIONS):
+        raw = os.path.join(directory, f"raw_{i:02d}.wav")
+        path = os.path.join(directory, f"utterance_{i:02d}.wav")
+        subprocess.run([espeak, "-w", raw, question], check=True)
+        # Resample to what record_audio produces (16 kHz mono int16)
+        subprocess.run(["ffmpeg", "-loglevel", "error", "-y", "-i", raw, "-ar", str(sample_rate),
+                        "-ac", "1", "-sample_fmt", "s16", path], check=True)
+        os.unlink(raw)
+        print(f"Wrote {path}: {question}")
+
+
+def capture(path, target, ring=None):
+    """Replay a WAV utterance the way the assistant hands it to Whisper
+
+    With a ring, frames go through AudioRing.write in callback-sized blocks and come back as a
+    float32 slice (record_to_ring); otherwise they are written to a temp WAV (record_audio).
+    """
+    with wave.open(path, "rb") as source:
+        params = source.getparams()
+        frames = source.readframes(source.getnframes())
+    if ring is not None:
+        samples = np.frombuffer(frames, dtype=np.int16).reshape(-1, params.nchannels)[:, :1]
+        samples = samples.astype(np.float32) / 32768
+        start = ring.position
+        for offset in range(0, len(samples), CALLBACK_FRAMES):
+            ring.write(samples[offset:offset + CALLBACK_FRAMES])
+        return ring.read(start, len(samples))[:, 0]
+    with wave.open(target, "wb") as wf:
+        wf.setnchannels(params.nchannels)
+        wf.setsampwidth(params.sampwidth)
+        wf.setframerate(params.framerate)
+        wf.writeframes(frames)
+    return target
+
+
+def synthesize(text, engine, target):
+    """Render speech to a file without playing it, so only synthesis time is measured"""
+    if engine == "espeak":
+        subprocess.run(["espeak", "-w", target, text], check=True)
+    elif engine == "piper":
+        from config import TTS_CONFIG
+        piper = TTS_CONFIG["jetson"]
+        subprocess.run([piper["piper_path"], "--model", piper["model_path"], "--output_file", target],
+                       input=text.encode(), check=True, stdout=subprocess.DEVNULL)
+
+
+def run_benchmark(files, llm_url, tts_engine, runs):
+    import assistant_ollama  # Loads Whisper, the embedding model and the FAISS index
+    from config import AUDIO_CONFIG
+
+    assistant_ollama.OLLAMA_URL = llm_url
+    ring = None
+    if AUDIO_CONFIG["ring_buffer"]:
+        # A private ring, so a running assistant's microphone ring is left alone
+        ring = AudioRing.create(f"{AUDIO_CONFIG['ring_name']}_bench_{os.getpid()}",
+                                seconds=AUDIO_CONFIG["ring_seconds"], sample_rate=AUDIO_CONFIG["sample_rate"])
+    samples = {stage: [] for stage in STAGES}
+    errors = 0
+    workdir = tempfile.mkdtemp(prefix="bench_")
+    started = time.perf_counter()
+    try:
+        for _ in range(runs):
+            for path in files:
+                timings = {}
+
+                t0 = time.perf_counter()
+                audio = capture(path, os.path.join(workdir, "capture.wav"), ring)
+                t1 = time.perf_counter()
+                text = assistant_ollama.transcribe_audio(audio).strip()
+                t2 = time.perf_counter()
+                query_embedding = assistant_ollama.db.encode_query(text)
+                context = " ".join(assistant_ollama.db.search(text, query_embedding=query_embedding))
+                t3 = time.perf_counter()
+                response = assistant_ollama.ask_ollama(text, context)
+                t4 = time.perf_counter()
+                if response.startswith("Error"):
+                    errors += 1
+                    print(f"  {os.path.basename(path)}: {response}")
+                    continue
+                if tts_engine != "none":
+                    synthesize(response, tts_engine, os.path.join(workdir, "response.wav"))
+                t5 = time.perf_counter()
+
+                timings.update(capture=t1 - t0, whisper=t2 - t1, retrieval=t3 - t2, llm=t4 - t3,
+                               tts=t5 - t4, total=t5 - t0)
+                for stage, value in timings.items():
+                    samples[stage].append(value)
+    finally:
+        audio = None  # Release the last slice so the shared memory can be unmapped
+        if ring is not None:
+            ring.close()
+    elapsed = time.perf_counter() - started
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    completed = len(samples["total"])
+    return {
+        "utterances": completed,
+        "errors": errors,
+        "throughput_per_min": completed / elapsed * 60 if elapsed else 0.0,
+        "stages": {stage: summarize(values) for stage, values in samples.items() if values},
+    }
+
+
+def print_report(results):
+    print(f"\n{'Stage':<10} {'mean':>8} {'p50':>8} {'p95':>8} {'max':>8}   (ms)")
+    print("-" * 50)
+    for stage, stats in results["stages"].items():
+        print(f"{stage:<10} {stats['mean'] * 1000:8.1f} {stats['p50'] * 1000:8.1f} "
+              f"{stats['p95'] * 1000:8.1f} {stats['max'] * 1000:8.1f}")
+    print("-" * 50)
+    print(f"Utterances: {results['utterances']}  Errors: {results['errors']}  "
+          f"Throughput: {results['throughput_per_min']:.1f}/min")
+
+
+def check_regression(results, baseline, tolerance):
+    """Return the stages whose p50 or p95 got slower than baseline by more than tolerance, and new errors"""
+    regressions = []
+    if results["errors"] > baseline.get("errors", 0):
+        regressions.append(f"errors: {results['errors']} > {baseline.get('errors', 0)}")
+    for stage, stats in results["stages"].items():
+        reference = baseline.get("stages", {}).get(stage)
+        if not reference:
+            continue
+        for key in ("p50", "p95"):
+            limit = reference[key] * (1 + tolerance)
+            if stats[key] > limit:
+                regressions.append(f"{stage} {key}: {stats[key] * 1000:.1f}ms > {limit * 1000:.1f}ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end pipeline benchmark")
+    parser.add_argument("wav_dir", help="Directory of WAV utterances (16 kHz mono)")
+    parser.add_argument("--generate-fixtures", action="store_true", help="Create WAV fixtures in wav_dir with espeak and exit")
+    parser.add_argument("--llm-url", help="Use a running server instead of the built-in stub")
+    parser.add_argument("--tokens-per-second", type=float, default=20.0, help="Stub server token rate")
+    parser.add_argument("--first-token-delay", type=float, default=0.2, help="Stub server prompt processing time")
+    parser.add_argument("--tts", choices=["none", "espeak", "piper"], default="none")
+    parser.add_argument("--runs", type=int, default=1, help="Passes over the WAV directory")
+    parser.add_argument("--output", help="Write results as JSON (use as a future baseline)")
+    parser.add_argument("--baseline", help="Fail if slower than this results JSON")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown vs. baseline (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    if args.generate_fixtures:
+        generate_fixtures(args.wav_dir)
+        return
+
+    files = sorted(glob.glob(os.path.join(args.wav_dir, "*.wav")))
+    if not files:
+        sys.exit(f"No WAV files in {args.wav_dir} (create some with --generate-fixtures)")
+
+    stub = None
+    llm_url = args.llm_url
+    if not llm_url:
+        from config import MODEL_NAME
+        stub = StubLLMServer(tokens_per_second=args.tokens_per_second,
+                             first_token_delay=args.first_token_delay, models=[MODEL_NAME]).start()
+        llm_url = f"{stub.base_url}/api/generate"
+
+    print("Voice Assistant Pipeline Benchmark")
+    print("=" * 50)
+    print(f"{len(files)} utterances x {args.runs} runs, LLM at {llm_url}")
+    try:
+        results = run_benchmark(files, llm_url, args.tts, args.runs)
+    finally:
+        if stub:
+            stub.stop()
+    if not results["utterances"]:
+        sys.exit("No utterance completed")
+    print_report(results)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = check_regression(results, json.load(file), args.tolerance)
+        if regressions:
+            print("\nREGRESSION:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"\nWithin {args.tolerance:.0%} of baseline")
+
+
+if __name__ == "__main__":
+    main()
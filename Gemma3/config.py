@@ -17,6 +17,26 @@ MODEL_NAME = "gemma3n:e2b"  # Change this to use different models
 # MODEL_NAME = "gemma3:2b"      # Small, fast
 # MODEL_NAME = "gemma2:2b"      # Legacy, small, fast
 
+# Model Residency (keeps MODEL_NAME loaded so questions after idle periods don't pay a reload)
+RESIDENCY_CONFIG = {
+    "enabled": True,
+    "keep_alive": "30m",      # Sent with every request; -1 keeps the model loaded forever
+    "ping_interval": 240,     # Seconds between warm pings
+    "memory_budget_mb": 6500, # Unified memory available to Whisper + embeddings + LLM
+    "llm_estimate_mb": 2500   # Used until Ollama reports the real size in /api/ps
+}
+
+# Multi-Model Routing (pull every model listed here first, e.g. ollama pull gemma3n:e4b)
+ROUTER_CONFIG = {
+    "enabled": False,
+    "tiers": [                # Smallest first; latency_budget is seconds per reply
+        {"model": "gemma3n:e2b", "latency_budget": 6.0},
+        {"model": "gemma3n:e4b", "latency_budget": 10.0},
+    ],
+    "long_query_words": 14,   # Questions this long count as harder
+    "min_similarity": 0.35    # Retrieval below this cosine similarity counts as harder
+}
+
 # Generation Parameters
 GENERATION_OPTIONS = {
     "num_predict": 80,    # Maximum response length
@@ -24,6 +44,15 @@ GENERATION_OPTIONS = {
     "top_p": 0.9         # Response diversity
 }
 
+# Spoken Reply Budget (streams the reply and stops at a sentence end once it is long enough to speak)
+SPEECH_BUDGET = {
+    "enabled": True,
+    "target_seconds": 12,     # Stop at the first sentence end after this much speech
+    "words_per_second": 2.5,  # Speaking rate of the TTS voice
+    "max_tokens": 160,        # Hard ceiling sent to Ollama as num_predict
+    "stop": ["Question:", "Context:"]  # Model starting a new turn on its own
+}
+
 # Assistant Configuration
 INITIAL_PROMPT = (
     "You're an AI assistant specialized in AI development, embedded systems like the Jetson Nano, and Google technologies. "
@@ -48,7 +77,12 @@ AUDIO_CONFIG = {
     "duration": 5,        # Recording duration in seconds
     "sample_rate": 16000, # Audio sample rate
     "channels": 1,        # Mono audio
-    "dtype": "int16"      # Audio data type
+    "dtype": "int16",     # Audio data type
+    "ring_buffer": True,  # Capture into a shared-memory ring other processes can read (audio_ring.py)
+    "ring_name": "gemma_audio",  # Shared memory name consumers attach to
+    "ring_seconds": 30,   # Audio history kept in the ring
+    "device": "920",      # Input device name substring (Logitech C920), first input device otherwise
+    "rescan_interval": 10 # Seconds between hot-plug checks (/proc/asound/cards) while on a fallback device
 }
 
 # Platform-specific TTS Configuration
@@ -69,12 +103,43 @@ TTS_CONFIG = {
     }
 }
 
+# Embedding Model Configuration
+EMBEDDING_CONFIG = {
+    "backend": "torch",   # "torch" (SentenceTransformer) or "onnx" (ONNX Runtime, no torch import)
+    "model": "all-MiniLM-L6-v2",
+    "onnx_dir": "models/all-MiniLM-L6-v2-onnx",  # Created by: python embeddings.py
+    "quantized": True     # Use the int8 dynamic-quantized ONNX export
+}
+
 # FAISS Configuration
 FAISS_CONFIG = {
     "dimension": 384,     # Embedding dimension for all-MiniLM-L6-v2
     "top_k": 3           # Number of relevant documents to retrieve
 }
 
+# Semantic Response Cache Configuration
+CACHE_CONFIG = {
+    "enabled": True,
+    "threshold": 0.92,    # Cosine similarity needed to reuse a past answer
+    "max_entries": 256,   # Least recently used answers are evicted beyond this
+    "ttl": 24 * 3600,     # Seconds before a cached answer expires
+    "path": "cache/responses"  # Persistence prefix relative to Gemma3/ (None = memory only)
+}
+
+# Server Configuration (python server.py)
+SERVER_CONFIG = {
+    "host": "0.0.0.0",
+    "port": 8000,
+    "max_active": 4,      # Concurrent generations sent to Ollama
+    "max_queue": 16,      # Requests allowed to wait for a slot before answering 503
+    "embed_workers": 2,   # Threads for query embedding + FAISS search
+    "asr_workers": 1,     # Threads for Whisper (one model instance is shared)
+    "session_ttl": 900,   # Seconds before an idle session is dropped
+    "history_turns": 2,   # Previous exchanges included in each session's prompt
+    "max_upload_mb": 10,  # Largest accepted audio upload
+    "cache_flush_interval": 30  # Seconds between batched response cache saves
+}
+
 # Whisper Configuration
 WHISPER_CONFIG = {
     "model": "tiny",      # Model size: tiny, base, small, medium, large
@@ -7,10 +7,11 @@ Optimized for Jetson Orin Nano
 import requests
 import faiss
 import numpy as np
-from sentence_transformers import SentenceTransformer
+from config import EMBEDDING_CONFIG
+from embeddings import load_embedding_model
 
-# Load sentence transformer model for document embeddings
-embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+# Load the embedding model selected in config.py (the ONNX backend keeps torch out of this demo)
+embedding_model = load_embedding_model(EMBEDDING_CONFIG)
 
 # Ollama server URL for completion
 ollama_url = "http://127.0.0.1:11434/api/generate"
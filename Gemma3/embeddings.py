@@ -0,0 +1,125 @@
+"""
+Embedding backends for the Ollama Voice Assistant
+The ONNX Runtime backend serves all-MiniLM-L6-v2 without sentence-transformers or torch
+(Whisper still imports torch, so only the text-only demo_text.py runs fully torch-free)
+"""
+
+import os
+
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+
+
+class OnnxEmbeddingModel:
+    """Drop-in replacement for SentenceTransformer.encode backed by ONNX Runtime"""
+
+    def __init__(self, model_dir, quantized=True, max_length=256, threads=None):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        self.model_path = os.path.join(model_dir, "model_int8.onnx" if quantized else "model.onnx")
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(self.model_path, options,
+                                            providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding()
+
+    def encode(self, sentences, batch_size=32):
+        """Mean-pooled, L2-normalized embeddings, same as the sentence-transformers pipeline"""
+        single = isinstance(sentences, str)
+        if single:
+            sentences = [sentences]
+        batches = []
+        for start in range(0, len(sentences), batch_size):
+            encodings = self.tokenizer.encode_batch(sentences[start:start + batch_size])
+            input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+            attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+            feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+            if "token_type_ids" in self.input_names:
+                feeds["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+            token_embeddings = self.session.run(None, feeds)[0]
+
+            mask = attention_mask[..., None].astype(np.float32)
+            pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+            batches.append(pooled.astype(np.float32))
+        embeddings = np.concatenate(batches) if batches else np.zeros((0, 0), dtype=np.float32)
+        return embeddings[0] if single else embeddings
+
+
+def load_embedding_model(config):
+    """Load the embedding backend selected in EMBEDDING_CONFIG"""
+    if config["backend"] == "onnx":
+        model_dir = os.path.join(current_dir, config["onnx_dir"])
+        return OnnxEmbeddingModel(model_dir, quantized=config["quantized"])
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(config["model"])
+
+
+def export_onnx(model_name, model_dir, quantize=True):
+    """Export a SentenceTransformer to ONNX (fp32 and optionally dynamic int8) plus its tokenizer"""
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    os.makedirs(model_dir, exist_ok=True)
+    model = SentenceTransformer(model_name, device="cpu")
+    transformer = model[0].auto_model.eval()
+    model.tokenizer.save_pretrained(model_dir)  # Writes tokenizer.json used at runtime
+
+    sample = model.tokenizer(["export sample"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["token_embeddings"] = {0: "batch", 1: "sequence"}
+    fp32_path = os.path.join(model_dir, "model.onnx")
+    with torch.no_grad():
+        torch.onnx.export(transformer, tuple(sample[name] for name in input_names), fp32_path,
+                          input_names=input_names, output_names=["token_embeddings"],
+                          dynamic_axes=dynamic_axes, opset_version=14)
+    print(f"Exported {fp32_path}")
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        int8_path = os.path.join(model_dir, "model_int8.onnx")
+        quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+        print(f"Quantized {int8_path}")
+
+
+def check_agreement(candidate, reference, sentences):
+    """Cosine similarity between two backends' embeddings for the same sentences"""
+    a = np.asarray(candidate.encode(sentences), dtype=np.float32)
+    b = np.asarray(reference.encode(sentences), dtype=np.float32)
+    a /= np.linalg.norm(a, axis=1, keepdims=True)
+    b /= np.linalg.norm(b, axis=1, keepdims=True)
+    return (a * b).sum(axis=1)
+
+
+def main():
+    import argparse
+    from config import EMBEDDING_CONFIG, KNOWLEDGE_DOCS
+
+    parser = argparse.ArgumentParser(description="Export and verify the ONNX embedding backend")
+    parser.add_argument("--no-quantize", action="store_true", help="Only export the fp32 model")
+    parser.add_argument("--min-cosine", type=float, default=0.99, help="Fail if any sentence agrees less than this")
+    args = parser.parse_args()
+
+    model_dir = os.path.join(current_dir, EMBEDDING_CONFIG["onnx_dir"])
+    export_onnx(EMBEDDING_CONFIG["model"], model_dir, quantize=not args.no_quantize)
+
+    from sentence_transformers import SentenceTransformer
+    reference = SentenceTransformer(EMBEDDING_CONFIG["model"], device="cpu")
+    ok = True
+    for quantized in ([False] if args.no_quantize else [False, True]):
+        cosines = check_agreement(OnnxEmbeddingModel(model_dir, quantized=quantized), reference, KNOWLEDGE_DOCS)
+        label = "int8" if quantized else "fp32"
+        print(f"{label}: min cosine {cosines.min():.4f}, mean cosine {cosines.mean():.4f}")
+        ok = ok and cosines.min() >= args.min_cosine
+    raise SystemExit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
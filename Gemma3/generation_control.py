@@ -0,0 +1,117 @@
+"""
+Adaptive generation budget for spoken replies
+Streams from Ollama (or a LLaMA.cpp server) and stops at a sentence boundary once the
+reply is long enough to speak, closing the stream so the server cancels generation
+"""
+
+import json
+import re
+
+import requests
+
+SENTENCE_END = re.compile(r"[.!?。！？][\"')\]]*\s*$")
+LAST_SENTENCE_END = re.compile(r"^.*[.!?。！？][\"')\]]*", re.DOTALL)
+
+
+class SpokenBudgetController:
+    """Decides when a streamed reply is long enough and tracks token usage"""
+
+    def __init__(self, target_seconds=12, words_per_second=2.5, max_tokens=160, stop=None):
+        self.target_seconds = target_seconds
+        self.words_per_second = words_per_second
+        self.max_tokens = max_tokens
+        self.stop = list(stop or [])
+        self.turns = 0
+        self.tokens_generated = 0
+        self.tokens_wasted = 0
+        self.early_stops = 0
+
+    def spoken_seconds(self, text):
+        """Rough speaking time of a reply at the TTS voice's rate"""
+        return len(text.split()) / self.words_per_second
+
+    def should_stop(self, text):
+        """True once the target duration is reached and the text ends a sentence"""
+        return self.spoken_seconds(text) >= self.target_seconds and bool(SENTENCE_END.search(text))
+
+    def cut_at_stop_sequence(self, text):
+        """Drop everything from the first stop sequence, e.g. the model starting a new 'Question:'"""
+        positions = [text.find(s) for s in self.stop if s in text]
+        return text[:min(positions)] if positions else text
+
+    def finalize(self, text, chunk_ends, stopped_early):
+        """Trim a dangling half sentence and record tokens generated vs. spoken"""
+        text = self.cut_at_stop_sequence(text)
+        if not SENTENCE_END.search(text):
+            match = LAST_SENTENCE_END.match(text)
+            if match:
+                text = match.group(0)
+        kept = len(text)
+        wasted = sum(1 for end in chunk_ends if end > kept)
+
+        self.turns += 1
+        self.tokens_generated += len(chunk_ends)
+        self.tokens_wasted += wasted
+        self.early_stops += int(stopped_early)
+        return text.strip(), {"tokens": len(chunk_ends), "wasted": wasted, "stopped_early": stopped_early}
+
+    def stats(self):
+        """Totals across turns for logging"""
+        return {
+            "turns": self.turns,
+            "tokens_generated": self.tokens_generated,
+            "tokens_wasted": self.tokens_wasted,
+            "early_stops": self.early_stops,
+            "avg_tokens": self.tokens_generated / self.turns if self.turns else 0.0,
+        }
+
+
+def _ollama_chunks(response):
+    for line in response.iter_lines():
+        if line:
+            chunk = json.loads(line)
+            yield chunk.get("response", ""), chunk.get("done", False)
+
+
+def _llamacpp_chunks(response):
+    for line in response.iter_lines():
+        if line.startswith(b"data: "):
+            chunk = json.loads(line[len(b"data: "):])
+            yield chunk.get("content", ""), chunk.get("stop", False)
+
+
+def generate_spoken(url, data, controller, api="ollama", timeout=120):
+    """Stream a completion under the controller's budget, returning (text, turn_stats)
+
+    ``data`` is the usual request body for the server; streaming, the token ceiling
+    and stop sequences are filled in here. Raises requests exceptions like requests.post.
+    """
+    data = dict(data, stream=True)
+    if api == "ollama":
+        data["options"] = dict(data.get("options", {}), num_predict=controller.max_tokens, stop=controller.stop)
+        chunks = _ollama_chunks
+    else:
+        data.update(n_predict=controller.max_tokens, stop=controller.stop)
+        chunks = _llamacpp_chunks
+
+    text = ""
+    chunk_ends = []  # Text length after each streamed token, to count wasted tokens later
+    stopped_early = False
+    response = requests.post(url, json=data, headers={'Content-Type': 'application/json'},
+                             stream=True, timeout=timeout)
+    try:
+        if not response.ok:
+            response.content  # Read the error body before the stream is closed
+        response.raise_for_status()
+        for piece, done in chunks(response):
+            text += piece
+            if piece:
+                chunk_ends.append(len(text))
+            if done:
+                break
+            if controller.should_stop(text) or controller.cut_at_stop_sequence(text) != text:
+                stopped_early = True
+                break
+    finally:
+        response.close()  # Closing mid-stream makes the server abort the generation
+    return controller.finalize(text, chunk_ends, stopped_early)
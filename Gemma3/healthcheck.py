@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Fast health check for the Ollama Voice Assistant
+Probes the Ollama server, audio devices and on-disk index files without loading any
+model, so it finishes in well under a second and can be used as a liveness probe
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import urllib.error
+import urllib.request
+
+from config import AUDIO_CONFIG, CACHE_CONFIG, EMBEDDING_CONFIG, MODEL_NAME, OLLAMA_URL
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+
+
+def check_ollama(timeout):
+    """Ollama answers /api/tags and has MODEL_NAME pulled"""
+    url = OLLAMA_URL.split("/api/")[0] + "/api/tags"
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            models = [m["name"] for m in json.load(response).get("models", [])]
+    except (urllib.error.URLError, OSError, ValueError) as e:
+        return False, f"cannot reach {url}: {e}"
+    if MODEL_NAME not in models:
+        return False, f"{MODEL_NAME} not pulled (have: {', '.join(models) or 'none'})"
+    return True, f"{MODEL_NAME} available"
+
+
+def check_audio():
+    """At least one input device is visible to PortAudio"""
+    try:
+        import sounddevice as sd
+        inputs = [d["name"] for d in sd.query_devices() if d["max_input_channels"] > 0]
+    except Exception as e:
+        return False, f"audio unavailable: {e}"
+    if not inputs:
+        return False, "no input devices"
+    preferred = [name for name in inputs if AUDIO_CONFIG["device"].lower() in name.lower()]
+    return True, f"{len(inputs)} input devices" + (f", using {preferred[0]}" if preferred else "")
+
+
+def check_files():
+    """Index and model files the assistant will load are present and readable"""
+    problems, found = [], []
+    for sound in ("bip.wav", "bip2.wav"):
+        path = os.path.join(current_dir, "../Gemma2/assets", sound)
+        if not os.path.exists(path):
+            problems.append(f"missing {sound}")
+
+    if CACHE_CONFIG["enabled"] and CACHE_CONFIG["path"]:
+        prefix = os.path.join(current_dir, CACHE_CONFIG["path"])
+        if os.path.exists(f"{prefix}.json"):
+            try:
+                with open(f"{prefix}.json") as file:
+                    found.append(f"response cache ({len(json.load(file))} entries)")
+            except (OSError, ValueError) as e:
+                problems.append(f"unreadable response cache: {e}")
+            if not os.path.exists(f"{prefix}.npy"):
+                problems.append("response cache embeddings (.npy) missing")
+
+    if EMBEDDING_CONFIG["backend"] == "onnx":
+        model_dir = os.path.join(current_dir, EMBEDDING_CONFIG["onnx_dir"])
+        model_file = "model_int8.onnx" if EMBEDDING_CONFIG["quantized"] else "model.onnx"
+        for name in (model_file, "tokenizer.json"):
+            if not os.path.exists(os.path.join(model_dir, name)):
+                problems.append(f"missing {name} (run: python embeddings.py)")
+        if not problems:
+            found.append("ONNX embedding model")
+
+    if AUDIO_CONFIG["ring_buffer"] and os.path.exists(f"/dev/shm/{AUDIO_CONFIG['ring_name']}"):
+        found.append("audio ring active")
+    if problems:
+        return False, "; ".join(problems)
+    return True, ", ".join(found) or "no index files yet"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fast liveness check (no model loading)")
+    parser.add_argument("--timeout", type=float, default=0.5, help="Seconds to wait for Ollama")
+    parser.add_argument("--skip-audio", action="store_true", help="For headless servers without a microphone")
+    parser.add_argument("--json", action="store_true", help="Machine-readable output")
+    args = parser.parse_args()
+
+    checks = [("ollama", lambda: check_ollama(args.timeout)), ("files", check_files)]
+    if not args.skip_audio:
+        checks.append(("audio", check_audio))
+
+    start = time.perf_counter()
+    results = {}
+    for name, check in checks:
+        check_start = time.perf_counter()
+        ok, detail = check()
+        results[name] = {"ok": ok, "detail": detail, "ms": round((time.perf_counter() - check_start) * 1000, 1)}
+    healthy = all(r["ok"] for r in results.values())
+    total_ms = round((time.perf_counter() - start) * 1000, 1)
+
+    if args.json:
+        print(json.dumps({"healthy": healthy, "ms": total_ms, "checks": results}))
+    else:
+        for name, result in results.items():
+            print(f"{'OK  ' if result['ok'] else 'FAIL'} {name:<7} {result['detail']} ({result['ms']}ms)")
+        print(f"{'Healthy' if healthy else 'Unhealthy'} in {total_ms}ms")
+    sys.exit(0 if healthy else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Load test for the multi-session assistant server
+Simulates concurrent users against server.py, optionally spawning it with a stub LLM
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+import aiohttp
+
+from stub_llm_server import StubLLMServer
+
+QUESTIONS = [
+    "What is the Jetson Orin Nano?",
+    "How does retrieval augmented generation work?",
+    "Why run models locally instead of in the cloud?",
+    "What is Ollama used for?",
+    "Tell me about Gemma3n.",
+]
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def ask(http, server_url, session_id, question, results):
+    """One streamed request; records time to first token and total time"""
+    start = time.perf_counter()
+    first_token = None
+    try:
+        async with http.post(f"{server_url}/ask", json={"session": session_id, "question": question}) as response:
+            if response.status == 503:
+                results["rejected"] += 1
+                return session_id
+            if response.status != 200:
+                results["errors"] += 1
+                return session_id
+            async for line in response.content:
+                message = json.loads(line)
+                if "token" in message and first_token is None:
+                    first_token = time.perf_counter() - start
+                if message.get("done"):
+                    session_id = message["session"]
+    except aiohttp.ClientError:
+        results["errors"] += 1
+        return session_id
+    results["ttft"].append(first_token if first_token is not None else time.perf_counter() - start)
+    results["total"].append(time.perf_counter() - start)
+    return session_id
+
+
+async def user(http, server_url, index, turns, results):
+    """A user asking several questions in one session"""
+    session_id = None
+    for turn in range(turns):
+        question = QUESTIONS[(index + turn) % len(QUESTIONS)]
+        session_id = await ask(http, server_url, session_id, question, results)
+
+
+async def run_load(server_url, users, turns):
+    results = {"ttft": [], "total": [], "rejected": 0, "errors": 0}
+    connector = aiohttp.TCPConnector(limit=users)
+    async with aiohttp.ClientSession(connector=connector) as http:
+        start = time.perf_counter()
+        await asyncio.gather(*(user(http, server_url, i, turns, results) for i in range(users)))
+        elapsed = time.perf_counter() - start
+        async with http.get(f"{server_url}/health") as response:
+            health = await response.json()
+    return results, elapsed, health
+
+
+async def wait_for_server(server_url, timeout):
+    deadline = time.time() + timeout
+    async with aiohttp.ClientSession() as http:
+        while time.time() < deadline:
+            try:
+                async with http.get(f"{server_url}/health") as response:
+                    if response.status == 200:
+                        return True
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.5)
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test server.py")
+    parser.add_argument("--server", default="http://127.0.0.1:8000", help="Base URL of server.py")
+    parser.add_argument("--users", type=int, default=20, help="Concurrent users")
+    parser.add_argument("--turns", type=int, default=3, help="Questions per user")
+    parser.add_argument("--spawn", action="store_true", help="Start server.py against a stub LLM")
+    parser.add_argument("--tokens-per-second", type=float, default=20.0, help="Stub LLM token rate")
+    args = parser.parse_args()
+
+    stub = server = None
+    server_url = args.server
+    if args.spawn:
+        from config import MODEL_NAME
+        stub = StubLLMServer(tokens_per_second=args.tokens_per_second, models=[MODEL_NAME]).start()
+        port = server_url.rsplit(":", 1)[-1]
+        server = subprocess.Popen([sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "server.py"),
+                                   "--host", "127.0.0.1", "--port", port,
+                                   "--llm-url", f"{stub.base_url}/api/generate"])
+        print("Waiting for server.py to load models...")
+
+    try:
+        if not asyncio.run(wait_for_server(server_url, timeout=300 if args.spawn else 5)):
+            sys.exit(f"Server not reachable at {server_url}")
+
+        print(f"Load test: {args.users} users x {args.turns} turns against {server_url}")
+        results, elapsed, health = asyncio.run(run_load(server_url, args.users, args.turns))
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+        if stub:
+            stub.stop()
+
+    completed = len(results["total"])
+    print("=" * 50)
+    print(f"Completed: {completed}  Rejected (503): {results['rejected']}  Errors: {results['errors']}")
+    if completed:
+        print(f"Time to first token: p50 {percentile(results['ttft'], 0.5) * 1000:.0f}ms  "
+              f"p95 {percentile(results['ttft'], 0.95) * 1000:.0f}ms")
+        print(f"Request time:        p50 {percentile(results['total'], 0.5) * 1000:.0f}ms  "
+              f"p95 {percentile(results['total'], 0.95) * 1000:.0f}ms")
+        print(f"Throughput: {completed / elapsed:.2f} requests/s")
+    print(f"Server: {health}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Model residency manager for Ollama on the Jetson Orin Nano
+Keeps MODEL_NAME loaded with keep_alive and periodic warm pings, budgets unified memory
+across Whisper, the embedding model and the LLM, and reports load/unload events
+"""
+
+import os
+import threading
+import time
+
+import requests
+
+
+def model_size_mb(model, fallback_mb=0.0):
+    """Parameter memory of a torch model, the file size of an ONNX session, or a fallback estimate"""
+    if hasattr(model, "parameters"):
+        try:
+            return sum(p.numel() * p.element_size() for p in model.parameters()) / 2**20
+        except Exception:
+            pass
+    path = getattr(model, "model_path", None)
+    if path and os.path.exists(path):
+        return os.path.getsize(path) / 2**20
+    return fallback_mb
+
+
+class ModelResidencyManager:
+    """Keeps the LLM resident in Ollama and tracks memory use of every model in the process"""
+
+    def __init__(self, ollama_url, model_name, keep_alive="30m", ping_interval=240,
+                 memory_budget_mb=None, llm_estimate_mb=0.0, on_event=None):
+        self.base_url = ollama_url.split("/api/")[0]
+        self.model_name = model_name
+        self.keep_alive = keep_alive
+        self.ping_interval = ping_interval
+        self.memory_budget_mb = memory_budget_mb
+        self.llm_estimate_mb = llm_estimate_mb
+        self.on_event = on_event or self.print_event
+        self.components = {}   # name -> resident size in MB (Whisper, embedding model, ...)
+        self.resident = {}     # Ollama model name -> size in MB, as last seen in /api/ps
+        self.events = []
+        self._over_budget = False
+        self._stop = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def print_event(event):
+        print(f"[residency] {event['type']} {event['model']} {event.get('detail', '')}")
+
+    def register(self, name, size_mb):
+        """Account for a model loaded in this process"""
+        self.components[name] = size_mb
+        self.check_budget()
+
+    def _emit(self, kind, model, **detail):
+        event = {"type": kind, "model": model, "time": time.time(), **detail}
+        if detail:
+            event["detail"] = ", ".join(f"{k}={v}" for k, v in detail.items())
+        self.events.append(event)
+        self.on_event(event)
+
+    def loaded_models(self):
+        """Models Ollama currently holds in memory (name -> MB)"""
+        response = requests.get(f"{self.base_url}/api/ps", timeout=5)
+        response.raise_for_status()
+        return {m["name"]: m.get("size", 0) / 2**20 for m in response.json().get("models", [])}
+
+    def poll(self):
+        """Diff /api/ps against the last poll and emit load/unload events"""
+        current = self.loaded_models()
+        for name in current.keys() - self.resident.keys():
+            self._emit("load", name, size_mb=round(current[name]))
+        for name in self.resident.keys() - current.keys():
+            self._emit("unload", name)
+        self.resident = current
+        return current
+
+    def warm(self):
+        """Load (or keep) the model with a prompt-less request; returns the seconds it took"""
+        was_resident = self.model_name in self.resident
+        start = time.perf_counter()
+        response = requests.post(f"{self.base_url}/api/generate",
+                                 json={"model": self.model_name, "keep_alive": self.keep_alive}, timeout=300)
+        response.raise_for_status()
+        elapsed = time.perf_counter() - start
+        if not was_resident:
+            self._emit("warm", self.model_name, seconds=round(elapsed, 2))
+        return elapsed
+
+    def unload(self):
+        """Release the model now (keep_alive 0), e.g. before loading a bigger Whisper model"""
+        requests.post(f"{self.base_url}/api/generate", json={"model": self.model_name, "keep_alive": 0}, timeout=30)
+        self.poll()
+
+    def check_budget(self):
+        """Total resident memory versus the configured budget"""
+        # Every model Ollama holds counts (the router keeps other tiers warm too); estimate before the first poll
+        llm_mb = sum(self.resident.values()) if self.resident else self.llm_estimate_mb
+        total = sum(self.components.values()) + llm_mb
+        report = {"components": dict(self.components), "llm_mb": llm_mb, "total_mb": total,
+                  "budget_mb": self.memory_budget_mb}
+        over_budget = bool(self.memory_budget_mb) and total > self.memory_budget_mb
+        if over_budget and not self._over_budget:
+            self._emit("over-budget", self.model_name, total_mb=round(total), budget_mb=self.memory_budget_mb)
+        self._over_budget = over_budget
+        return report
+
+    def tick(self):
+        """One maintenance step: refresh residency, re-warm if evicted, check the budget"""
+        try:
+            self.poll()
+            self.warm()  # Also refreshes keep_alive in case another client shortened it
+            self.poll()
+            self.check_budget()
+        except requests.exceptions.RequestException as e:
+            self._emit("error", self.model_name, error=e.__class__.__name__)
+
+    def start(self):
+        """Warm the model now and keep it warm from a background thread"""
+        self.tick()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.ping_interval):
+            self.tick()
@@ -0,0 +1,70 @@
+"""
+Multi-model router for the Ollama Voice Assistant
+Sends short or well-covered questions to the smallest model and harder ones to a larger
+model, falling back to smaller tiers when measured latency exceeds a tier's budget
+"""
+
+import re
+
+HARD_QUESTION = re.compile(r"\b(why|explain|compare|difference|versus|vs|step|steps|design|trade-?offs?|pros|cons)\b",
+                           re.IGNORECASE)
+
+
+class ModelRouter:
+    """Picks a model tier per query and adapts to the latency each model actually shows"""
+
+    def __init__(self, tiers, long_query_words=14, min_similarity=0.35, smoothing=0.3):
+        # Tiers are ordered smallest first: [{"model": ..., "latency_budget": seconds}, ...]
+        self.tiers = tiers
+        self.long_query_words = long_query_words
+        self.min_similarity = min_similarity
+        self.smoothing = smoothing
+        self.latency = {tier["model"]: None for tier in tiers}  # Exponentially weighted average seconds
+        self.counts = {tier["model"]: {"requests": 0, "failures": 0, "fallbacks": 0} for tier in tiers}
+
+    def complexity(self, query, similarity=None):
+        """Cheap difficulty score from query length, wording and retrieval confidence"""
+        score = 0
+        if len(query.split()) >= self.long_query_words:
+            score += 1
+        if HARD_QUESTION.search(query):
+            score += 1
+        if query.count("?") > 1 or " and " in query.lower():
+            score += 1
+        if similarity is not None and similarity < self.min_similarity:
+            score += 1  # The knowledge base doesn't cover it, so the model has to do more work
+        return score
+
+    def choose(self, query, similarity=None):
+        """Model for this query: the tier matching its complexity, stepping down while over budget"""
+        index = min((self.complexity(query, similarity) + 1) // 2, len(self.tiers) - 1)
+        while index > 0 and self.over_budget(self.tiers[index]):
+            # Let a skipped model's latency decay so it is tried again once load drops
+            self.latency[self.tiers[index]["model"]] *= 0.9
+            index -= 1
+        return self.tiers[index]["model"]
+
+    def over_budget(self, tier):
+        latency = self.latency[tier["model"]]
+        return latency is not None and latency > tier["latency_budget"]
+
+    def fallback(self, model):
+        """Next smaller model after a failure or timeout, or None if already the smallest"""
+        names = [tier["model"] for tier in self.tiers]
+        index = names.index(model)
+        if index == 0:
+            return None
+        self.counts[model]["fallbacks"] += 1
+        return names[index - 1]
+
+    def record(self, model, seconds, ok=True):
+        """Feed back how long a request took so routing follows real load"""
+        counts = self.counts[model]
+        counts["requests"] += 1
+        if not ok:
+            counts["failures"] += 1
+        previous = self.latency[model]
+        self.latency[model] = seconds if previous is None else previous + self.smoothing * (seconds - previous)
+
+    def stats(self):
+        return {model: dict(self.counts[model], avg_latency=self.latency[model]) for model in self.latency}
@@ -0,0 +1,149 @@
+"""
+Semantic response cache for the Ollama Voice Assistant
+Answers paraphrased questions from past responses instead of calling the LLM again
+"""
+
+import json
+import os
+import time
+from collections import OrderedDict
+
+import faiss
+import numpy as np
+
+
+def normalize(embedding):
+    """Return a float32 unit vector so inner product equals cosine similarity"""
+    vector = np.asarray(embedding, dtype=np.float32).reshape(-1)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+
+class SemanticCache:
+    """Small FAISS index of past questions mapped to their stored answers"""
+
+    def __init__(self, dim, threshold=0.92, max_entries=256, ttl=24 * 3600, path=None):
+        self.dim = dim
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = path
+        # IndexIDMap2 lets us remove single entries on eviction
+        self.index = faiss.IndexIDMap2(faiss.IndexFlatIP(dim))
+        self.entries = OrderedDict()  # id -> entry, least recently used first
+        self.embeddings = {}          # id -> normalized question embedding
+        self.next_id = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if path:
+            self.load()
+
+    def lookup(self, embedding):
+        """Return the cached entry for a similar question, or None on a miss"""
+        self._expire()
+        if self.index.ntotal == 0:
+            self.misses += 1
+            return None
+
+        scores, ids = self.index.search(normalize(embedding)[None, :], 1)
+        key, score = int(ids[0][0]), float(scores[0][0])
+        if key < 0 or score < self.threshold:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        entry = self.entries[key]
+        entry["last_used"] = time.time()
+        entry["hits"] += 1
+        self.entries.move_to_end(key)
+        return dict(entry, similarity=score)
+
+    def add(self, question, embedding, answer, audio_file=None, persist=True):
+        """Store an answer (and optionally its synthesized audio) for a question
+
+        With persist=False the caller is responsible for calling save() later (e.g. batched).
+        """
+        self._expire()
+        while len(self.entries) >= self.max_entries:
+            oldest = next(iter(self.entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+        key = self.next_id
+        self.next_id += 1
+        vector = normalize(embedding)
+        self.index.add_with_ids(vector[None, :], np.array([key], dtype=np.int64))
+        now = time.time()
+        self.entries[key] = {
+            "question": question,
+            "answer": answer,
+            "audio_file": audio_file,
+            "created": now,
+            "last_used": now,
+            "hits": 0,
+        }
+        self.embeddings[key] = vector
+        if self.path and persist:
+            self.save()
+        return key
+
+    def stats(self):
+        """Hit-rate metrics for logging"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def snapshot(self):
+        """Copy of the embeddings and entries, so they can be written out from another thread"""
+        keys = list(self.entries)
+        vectors = np.array([self.embeddings[k] for k in keys], dtype=np.float32).reshape(-1, self.dim)
+        return vectors, [dict(self.entries[k]) for k in keys]
+
+    def save(self, snapshot=None):
+        """Persist entries and embeddings next to each other (<path>.json / <path>.npy)"""
+        vectors, entries = snapshot or self.snapshot()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        np.save(f"{self.path}.npy", vectors)
+        with open(f"{self.path}.json", "w") as file:
+            json.dump(entries, file)
+
+    def load(self):
+        """Restore a previously saved cache, skipping entries past their TTL"""
+        if not (os.path.exists(f"{self.path}.json") and os.path.exists(f"{self.path}.npy")):
+            return
+        try:
+            vectors = np.load(f"{self.path}.npy")
+            with open(f"{self.path}.json") as file:
+                entries = json.load(file)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable response cache: {e}")
+            return
+
+        now = time.time()
+        for entry, vector in zip(entries, vectors):
+            if now - entry["created"] > self.ttl:
+                continue
+            key = self.next_id
+            self.next_id += 1
+            self.index.add_with_ids(vector[None, :].astype(np.float32), np.array([key], dtype=np.int64))
+            self.entries[key] = entry
+            self.embeddings[key] = vector
+
+    def _expire(self):
+        now = time.time()
+        for key in [k for k, e in self.entries.items() if now - e["created"] > self.ttl]:
+            self._remove(key)
+            self.evictions += 1
+
+    def _remove(self, key):
+        self.index.remove_ids(np.array([key], dtype=np.int64))
+        del self.entries[key]
+        del self.embeddings[key]
@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+Multi-session HTTP/WebSocket server for the RAG assistant
+Many users share one embedding model, FAISS index, Whisper model and Ollama connection pool
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import aiohttp
+from aiohttp import web
+
+from config import (GENERATION_OPTIONS, INITIAL_PROMPT, MODEL_NAME, OLLAMA_URL, RESIDENCY_CONFIG, SERVER_CONFIG,
+                    SPEECH_BUDGET)
+from generation_control import SpokenBudgetController
+
+
+class Busy(Exception):
+    """Raised when admission control rejects a request"""
+
+
+class AssistantServer:
+    """Shares the models across sessions and streams answers back token by token"""
+
+    def __init__(self, db, transcribe, llm_url=OLLAMA_URL, model_name=MODEL_NAME, response_cache=None,
+                 config=SERVER_CONFIG, speech_budget=SPEECH_BUDGET, residency=RESIDENCY_CONFIG,
+                 residency_manager=None):
+        self.db = db
+        self.transcribe = transcribe
+        self.llm_url = llm_url
+        self.model_name = model_name
+        self.response_cache = response_cache
+        self.residency_manager = residency_manager  # Warm pings and load/unload events for the LLM
+        self.config = config
+        self.keep_alive = residency["keep_alive"] if residency["enabled"] else None
+        self.options = dict(GENERATION_OPTIONS)
+        self.budget = None  # Stops each stream at a sentence end once the reply is long enough to speak
+        if speech_budget["enabled"]:
+            self.budget = SpokenBudgetController(target_seconds=speech_budget["target_seconds"],
+                                                 words_per_second=speech_budget["words_per_second"],
+                                                 max_tokens=speech_budget["max_tokens"],
+                                                 stop=speech_budget["stop"])
+            self.options.update(num_predict=self.budget.max_tokens, stop=self.budget.stop)
+        # Embedding and Whisper are CPU/GPU bound and release the GIL, so thread pools keep the loop free
+        self.embed_pool = ThreadPoolExecutor(config["embed_workers"], thread_name_prefix="embed")
+        self.asr_pool = ThreadPoolExecutor(config["asr_workers"], thread_name_prefix="whisper")
+        self.slots = None  # asyncio.Semaphore bounding concurrent generations
+        self.http = None   # Shared aiohttp session (connection pool to Ollama)
+        self.sessions = {}
+        self.waiting = 0   # Admitted requests not generating yet (Whisper, retrieval or waiting for a slot)
+        self.active = 0
+        self.counters = {"requests": 0, "rejected": 0, "cache_hits": 0, "errors": 0}
+        self.cache_dirty = False  # New answers not yet written to disk
+
+    # Application lifecycle
+
+    def create_app(self):
+        app = web.Application(client_max_size=self.config["max_upload_mb"] * 1024 * 1024)
+        app.router.add_post("/ask", self.handle_ask)
+        app.router.add_post("/ask/audio", self.handle_ask_audio)
+        app.router.add_get("/ws", self.handle_websocket)
+        app.router.add_get("/health", self.handle_health)
+        app.on_startup.append(self.on_startup)
+        app.on_cleanup.append(self.on_cleanup)
+        return app
+
+    async def on_startup(self, app):
+        self.slots = asyncio.Semaphore(self.config["max_active"])
+        connector = aiohttp.TCPConnector(limit=self.config["max_active"])
+        self.http = aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=300))
+        app["session_reaper"] = asyncio.create_task(self.reap_sessions())
+        if self.response_cache is not None and self.response_cache.path:
+            app["cache_flusher"] = asyncio.create_task(self.flush_cache())
+        if self.residency_manager is not None:
+            # Loads the model before the first request; blocking, so off the loop
+            await asyncio.get_running_loop().run_in_executor(None, self.residency_manager.start)
+
+    async def on_cleanup(self, app):
+        app["session_reaper"].cancel()
+        if self.residency_manager is not None:
+            self.residency_manager.stop()
+        if "cache_flusher" in app:
+            app["cache_flusher"].cancel()
+            await self.save_cache()
+        await self.http.close()
+        self.embed_pool.shutdown(wait=False)
+        self.asr_pool.shutdown(wait=False)
+
+    # Per-session state
+
+    def get_session(self, session_id):
+        if not session_id or session_id not in self.sessions:
+            session_id = session_id or uuid.uuid4().hex
+            self.sessions[session_id] = {"history": [], "turns": 0, "last_seen": time.time()}
+        session = self.sessions[session_id]
+        session["last_seen"] = time.time()
+        return session_id, session
+
+    async def reap_sessions(self):
+        """Drop sessions idle for longer than session_ttl"""
+        while True:
+            await asyncio.sleep(60)
+            cutoff = time.time() - self.config["session_ttl"]
+            for session_id in [s for s, state in self.sessions.items() if state["last_seen"] < cutoff]:
+                del self.sessions[session_id]
+
+    async def flush_cache(self):
+        """Write new response cache entries to disk every cache_flush_interval seconds"""
+        while True:
+            await asyncio.sleep(self.config["cache_flush_interval"])
+            await self.save_cache()
+
+    async def save_cache(self):
+        """Snapshot on the loop, write the JSON and .npy files on the embedding pool"""
+        if not self.cache_dirty:
+            return
+        self.cache_dirty = False
+        snapshot = self.response_cache.snapshot()
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.embed_pool, self.response_cache.save, snapshot)
+
+    # Pipeline
+
+    def retrieve(self, question):
+        """Runs on the embedding pool: encode once, then cache lookup input and FAISS search"""
+        query_embedding = self.db.encode_query(question)
+        context = " ".join(self.db.search(question, query_embedding=query_embedding))
+        return query_embedding, context
+
+    def build_prompt(self, session, question, context):
+        history = "".join(f"Question: {q}\nAnswer: {a}\n" for q, a in session["history"])
+        return f"{INITIAL_PROMPT}\nContext: {context}\n{history}Question: {question}\nAnswer:"
+
+    @contextlib.contextmanager
+    def queued(self):
+        """Admission control: counts the request as waiting, or raises Busy when max_queue are already waiting"""
+        if self.waiting >= self.config["max_queue"]:
+            self.counters["rejected"] += 1
+            raise Busy()
+        self.waiting += 1
+        try:
+            yield
+        finally:
+            self.waiting -= 1
+
+    async def answer(self, session_id, question):
+        """Async generator of response tokens for one turn, with admission control"""
+        with self.queued():
+            _, session = self.get_session(session_id)
+            loop = asyncio.get_running_loop()
+            query_embedding, context = await loop.run_in_executor(self.embed_pool, self.retrieve, question)
+
+            # Answers to follow-ups depend on the session's history, so only first questions share the cache
+            shared = self.response_cache is not None and not session["history"]
+            cached = self.response_cache.lookup(query_embedding) if shared else None
+            if cached is None:
+                await self.slots.acquire()  # Cache hits never wait behind generations
+        if cached is not None:
+            self.counters["cache_hits"] += 1
+            self.remember(session, question, cached["answer"])
+            yield cached["answer"]
+            return
+
+        self.active += 1
+        try:
+            data = {
+                "model": self.model_name,
+                "prompt": self.build_prompt(session, question, context),
+                "stream": True,
+                "options": self.options,
+            }
+            if self.keep_alive is not None:
+                data["keep_alive"] = self.keep_alive
+            answer = ""
+            try:
+                # Leaving this block early (client gone) closes the stream and Ollama cancels the generation
+                async with self.http.post(self.llm_url, json=data) as response:
+                    if response.status != 200:
+                        self.counters["errors"] += 1
+                        raise web.HTTPBadGateway(text=f"Error: {response.status} - {await response.text()}")
+                    async for line in response.content:
+                        if not line.strip():
+                            continue
+                        chunk = json.loads(line)
+                        if chunk.get("response"):
+                            answer += chunk["response"]
+                            yield chunk["response"]
+                        if chunk.get("done") or (self.budget is not None and self.budget.should_stop(answer)):
+                            break
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self.counters["errors"] += 1
+                raise web.HTTPBadGateway(text=f"Error: Cannot connect to Ollama server at {self.llm_url} ({e})")
+
+            answer = answer.strip()
+            self.remember(session, question, answer)
+            if shared and answer:
+                self.response_cache.add(question, query_embedding, answer, persist=False)  # Saved in batches
+                self.cache_dirty = True
+        finally:
+            self.active -= 1
+            self.slots.release()
+
+    def remember(self, session, question, answer):
+        session["turns"] += 1
+        session["history"] = (session["history"] + [(question, answer)])[-self.config["history_turns"]:]
+
+    async def transcribe_upload(self, audio_bytes):
+        """Write the uploaded WAV to a temp file and run Whisper on the ASR pool"""
+        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmpfile:
+            tmpfile.write(audio_bytes)
+        try:
+            loop = asyncio.get_running_loop()
+            return (await loop.run_in_executor(self.asr_pool, self.transcribe, tmpfile.name)).strip()
+        finally:
+            os.unlink(tmpfile.name)
+
+    # HTTP handlers
+
+    async def stream_answer(self, request, session_id, question, heard=None):
+        """Stream NDJSON lines: optional {"heard"}, then {"token"}s, then {"done"}"""
+        session_id = session_id or uuid.uuid4().hex  # Registered by answer() once admitted
+        tokens = self.answer(session_id, question)
+        try:
+            first = await tokens.__anext__()
+        except Busy:
+            return web.json_response({"error": "Server busy, try again"}, status=503)
+        except StopAsyncIteration:
+            first = None
+
+        response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+        answer = ""
+        try:
+            await response.prepare(request)
+            if heard is not None:
+                await response.write((json.dumps({"heard": heard}) + "\n").encode())
+            if first is not None:
+                answer = first
+                await response.write((json.dumps({"token": first}) + "\n").encode())
+                async for token in tokens:
+                    answer += token
+                    await response.write((json.dumps({"token": token}) + "\n").encode())
+        except ConnectionResetError:
+            return response  # Client disconnected mid-answer
+        except web.HTTPException as e:
+            # The LLM failed after the response had started, so report it in the stream
+            await response.write((json.dumps({"error": e.text}) + "\n").encode())
+            await response.write_eof()
+            return response
+        finally:
+            await tokens.aclose()  # Frees the generation slot even if the client went away
+        await response.write((json.dumps({"done": True, "session": session_id,
+                                          "answer": answer.strip()}) + "\n").encode())
+        await response.write_eof()
+        return response
+
+    async def handle_ask(self, request):
+        self.counters["requests"] += 1
+        try:
+            body = await request.json()
+        except ValueError:
+            body = None
+        if not isinstance(body, dict):
+            return web.json_response({"error": "Body must be a JSON object"}, status=400)
+        question = str(body.get("question", "")).strip()
+        if not question:
+            return web.json_response({"error": "Missing 'question'"}, status=400)
+        return await self.stream_answer(request, body.get("session"), question)
+
+    async def handle_ask_audio(self, request):
+        self.counters["requests"] += 1
+        audio = await request.read()
+        if not audio:
+            return web.json_response({"error": "Empty audio upload"}, status=400)
+        try:
+            with self.queued():  # Admission before Whisper, so uploads can't pile up on the ASR pool
+                heard = await self.transcribe_upload(audio)
+        except Busy:
+            return web.json_response({"error": "Server busy, try again"}, status=503)
+        if not heard:
+            return web.json_response({"heard": "", "error": "No speech detected"}, status=422)
+        return await self.stream_answer(request, request.query.get("session"), heard, heard=heard)
+
+    async def handle_websocket(self, request):
+        """One session per socket: text frames are questions as JSON, binary frames are WAV audio"""
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        session_id, _ = self.get_session(request.query.get("session"))
+        await ws.send_json({"session": session_id})
+
+        async for message in ws:
+            if message.type not in (aiohttp.WSMsgType.TEXT, aiohttp.WSMsgType.BINARY):
+                break
+            self.counters["requests"] += 1
+            if message.type == aiohttp.WSMsgType.TEXT:
+                try:
+                    body = json.loads(message.data)
+                except ValueError:
+                    body = None
+                if not isinstance(body, dict):
+                    await ws.send_json({"error": "Text frames must be JSON objects"})
+                    continue
+                question = str(body.get("question", "")).strip()
+            else:
+                try:
+                    with self.queued():
+                        question = await self.transcribe_upload(message.data)
+                except Busy:
+                    await ws.send_json({"error": "Server busy, try again"})
+                    continue
+                await ws.send_json({"heard": question})
+            if not question:
+                await ws.send_json({"error": "Empty question"})
+                continue
+            answer = ""
+            tokens = self.answer(session_id, question)
+            try:
+                async for token in tokens:
+                    answer += token
+                    await ws.send_json({"token": token})
+            except Busy:
+                await ws.send_json({"error": "Server busy, try again"})
+                continue
+            except web.HTTPException as e:
+                await ws.send_json({"error": e.text})
+                continue
+            finally:
+                await tokens.aclose()
+            await ws.send_json({"done": True, "answer": answer.strip()})
+        return ws
+
+    async def handle_health(self, request):
+        return web.json_response(dict(self.counters, active=self.active,
+                                      waiting=self.waiting, sessions=len(self.sessions)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the RAG assistant over HTTP and WebSocket")
+    parser.add_argument("--host", default=SERVER_CONFIG["host"])
+    parser.add_argument("--port", type=int, default=SERVER_CONFIG["port"])
+    parser.add_argument("--llm-url", default=OLLAMA_URL, help="Ollama /api/generate URL (or a stub server)")
+    args = parser.parse_args()
+
+    import assistant_ollama  # Loads Whisper, the embedding model, the FAISS index and the response cache
+
+    residency = assistant_ollama.residency
+    if residency is not None:
+        residency.base_url = args.llm_url.split("/api/")[0]  # Warm and poll the server we actually use
+    server = AssistantServer(assistant_ollama.db, assistant_ollama.transcribe_audio, llm_url=args.llm_url,
+                             response_cache=assistant_ollama.response_cache, residency_manager=residency)
+    print(f"Assistant server on http://{args.host}:{args.port} (LLM at {args.llm_url})")
+    web.run_app(server.create_app(), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Startup profiler for the Ollama Voice Assistant
+Reports how long each heavy import and model load takes and how much memory it adds
+"""
+
+import argparse
+import importlib
+import json
+import os
+import resource
+import sys
+import time
+
+# In the order assistant_ollama.py pulls them in; later entries only pay for what is not loaded yet
+IMPORTS = ["numpy", "requests", "sounddevice", "faiss", "torch", "sentence_transformers", "whisper", "onnxruntime"]
+
+
+def rss_mb():
+    """Current resident set size (falls back to the peak where /proc is unavailable)"""
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+
+
+def measure(label, step, rows):
+    """Run one step and record its wall time and RSS growth"""
+    before = rss_mb()
+    start = time.perf_counter()
+    try:
+        result = step()
+        error = None
+    except Exception as e:
+        result, error = None, f"{e.__class__.__name__}: {e}"
+    rows.append({"step": label, "seconds": time.perf_counter() - start, "rss_delta_mb": rss_mb() - before,
+                 "rss_mb": rss_mb(), "error": error})
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile import and model-load time and memory")
+    parser.add_argument("--imports-only", action="store_true", help="Skip model loading")
+    parser.add_argument("--json", action="store_true", help="Machine-readable output")
+    args = parser.parse_args()
+
+    rows = []
+    started = time.perf_counter()
+    for module in IMPORTS:
+        measure(f"import {module}", lambda: importlib.import_module(module), rows)
+
+    if not args.imports_only:
+        from config import EMBEDDING_CONFIG, FAISS_CONFIG, KNOWLEDGE_DOCS, WHISPER_CONFIG
+        from embeddings import load_embedding_model
+
+        # Imports stay inside the measured steps, so a missing package is reported instead of crashing
+        embedding_model = measure(f"load embedding ({EMBEDDING_CONFIG['backend']})",
+                                  lambda: load_embedding_model(EMBEDDING_CONFIG), rows)
+        measure(f"load whisper ({WHISPER_CONFIG['model']})",
+                lambda: importlib.import_module("whisper").load_model(WHISPER_CONFIG["model"]), rows)
+        if embedding_model is not None:
+            def build_index():
+                import faiss
+                import numpy as np
+                index = faiss.IndexFlatL2(FAISS_CONFIG["dimension"])
+                index.add(np.array(embedding_model.encode(KNOWLEDGE_DOCS), dtype=np.float32))
+                return index
+            measure("build FAISS index", build_index, rows)
+            measure("first query embedding", lambda: embedding_model.encode(["warm-up question"]), rows)
+    total = time.perf_counter() - started
+
+    if args.json:
+        print(json.dumps({"total_seconds": total, "steps": rows}, indent=2))
+        return
+
+    print("Startup Profile")
+    print("=" * 64)
+    print(f"{'step':<34} {'time':>8} {'+RSS':>9} {'RSS':>9}")
+    for row in rows:
+        if row["error"]:
+            print(f"{row['step']:<34} {'skipped':>8}   {row['error'][:40]}")
+        else:
+            print(f"{row['step']:<34} {row['seconds']:7.2f}s {row['rss_delta_mb']:7.1f}MB {row['rss_mb']:7.1f}MB")
+    print("-" * 64)
+    print(f"{'total':<34} {total:7.2f}s {'':>9} {rss_mb():7.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Stub LLM server for offline benchmarks and load tests
+Emulates Ollama's /api/generate, /api/tags and /api/ps (including keep_alive eviction)
+and LLaMA.cpp's /completion with a configurable token rate, so the pipeline can be
+measured without a model
+"""
+
+import argparse
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_REPLY = (
+    "The Jetson Orin Nano runs Gemma locally with low latency. "
+    "Retrieval adds relevant documents to the prompt before generation. "
+    "Edge deployment keeps your data private and avoids network round trips. "
+    "You can switch models in the configuration file. "
+)
+
+
+def parse_keep_alive(value, default=300.0):
+    """Seconds for an Ollama keep_alive value ("30m", "1h30m", 600, -1 = forever, 0 = unload now)"""
+    if value is None:
+        return default
+    if isinstance(value, (int, float)):
+        return float("inf") if value < 0 else float(value)
+    if value.lstrip("-").replace(".", "", 1).isdigit():
+        return parse_keep_alive(float(value))
+    units = {"h": 3600, "m": 60, "s": 1, "ms": 0.001}
+    parts = re.findall(r"(-?[\d.]+)(ms|h|m|s)", value)
+    if not parts:
+        return default
+    seconds = sum(float(number) * units[unit] for number, unit in parts)
+    return float("inf") if seconds < 0 else seconds
+
+
+class StubLLMServer:
+    """Threaded HTTP server that streams canned tokens at a fixed rate"""
+
+    def __init__(self, host="127.0.0.1", port=0, tokens_per_second=20.0, first_token_delay=0.2,
+                 reply=DEFAULT_REPLY, models=("gemma3n:e2b",), load_delay=0.0, model_size_mb=2048):
+        self.tokens_per_second = tokens_per_second
+        self.first_token_delay = first_token_delay
+        self.load_delay = load_delay          # Simulated cost of loading an evicted model
+        self.model_size_mb = model_size_mb
+        self.loaded = {}                      # model -> expiry time, emulating Ollama's keep_alive
+        self.tokens = [word + " " for word in reply.split()]
+        self.models = list(models)
+        self.lock = threading.Lock()
+        self.counters = {"requests": 0, "tokens": 0, "cancelled": 0, "loads": 0}
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Serve in a background thread (for use inside benchmarks and tests)"""
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def stats(self):
+        with self.lock:
+            return dict(self.counters)
+
+    def count(self, key, amount=1):
+        with self.lock:
+            self.counters[key] += amount
+
+    def resident_models(self):
+        """Models still within their keep_alive window"""
+        now = time.time()
+        with self.lock:
+            for model in [m for m, expires in self.loaded.items() if expires <= now]:
+                del self.loaded[model]
+            return dict(self.loaded)
+
+    def touch(self, model, keep_alive):
+        """Load the model if it was evicted (paying load_delay) and extend its keep_alive"""
+        if model not in self.resident_models():
+            self.count("loads")
+            time.sleep(self.load_delay)
+        seconds = parse_keep_alive(keep_alive)
+        with self.lock:
+            if seconds <= 0:
+                self.loaded.pop(model, None)
+            else:
+                self.loaded[model] = time.time() + seconds
+
+    def generate(self, max_tokens, stop):
+        """Yield reply tokens at the configured rate, honouring num_predict and stop sequences"""
+        time.sleep(self.first_token_delay)
+        text = ""
+        for i in range(max_tokens):
+            token = self.tokens[i % len(self.tokens)]
+            if any(s in text + token for s in stop):
+                return
+            text += token
+            if i:
+                time.sleep(1.0 / self.tokens_per_second)
+            yield token
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass  # Keep benchmark output clean
+
+            def _send_json(self, payload, status=200):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _read_json(self):
+                length = int(self.headers.get("Content-Length", 0))
+                return json.loads(self.rfile.read(length) or b"{}")
+
+            def do_GET(self):
+                if self.path == "/api/tags":
+                    self._send_json({"models": [{"name": name, "model": name} for name in server.models]})
+                elif self.path == "/api/ps":
+                    size = server.model_size_mb * 2**20
+                    self._send_json({"models": [
+                        {"name": name, "model": name, "size": size, "size_vram": size,
+                         "expires_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(min(expires, 2**31 - 1)))}
+                        for name, expires in server.resident_models().items()]})
+                elif self.path == "/stub/stats":
+                    self._send_json(server.stats())
+                else:
+                    self._send_json({"error": "not found"}, 404)
+
+            def do_POST(self):
+                data = self._read_json()
+                if self.path == "/api/generate":
+                    self._ollama_generate(data)
+                elif self.path == "/completion":
+                    self._llamacpp_completion(data)
+                else:
+                    self._send_json({"error": "not found"}, 404)
+
+            def _stream(self, content_type, tokens, format_chunk, final_chunk):
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.end_headers()
+                produced = 0
+                try:
+                    for token in tokens:
+                        produced += 1
+                        self.wfile.write(format_chunk(token))
+                        self.wfile.flush()
+                    self.wfile.write(final_chunk(produced))
+                    self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    server.count("cancelled")  # Client closed the stream, stop generating
+                server.count("tokens", produced)
+
+            def _ollama_generate(self, data):
+                server.count("requests")
+                if data.get("model") not in server.models:
+                    self._send_json({"error": f"model '{data.get('model')}' not found"}, 404)
+                    return
+                if parse_keep_alive(data.get("keep_alive")) <= 0 and not data.get("prompt"):
+                    with server.lock:
+                        server.loaded.pop(data["model"], None)
+                    self._send_json({"model": data["model"], "response": "", "done": True, "done_reason": "unload"})
+                    return
+                server.touch(data["model"], data.get("keep_alive"))
+                if not data.get("prompt"):
+                    self._send_json({"model": data["model"], "response": "", "done": True, "done_reason": "load"})
+                    return
+                options = data.get("options", {})
+                tokens = server.generate(options.get("num_predict", 128), options.get("stop", []))
+                model = data["model"]
+                if not data.get("stream", True):
+                    text = "".join(tokens)
+                    server.count("tokens", len(text.split()))
+                    self._send_json({"model": model, "response": text, "done": True,
+                                     "eval_count": len(text.split())})
+                    return
+                self._stream(
+                    "application/x-ndjson", tokens,
+                    lambda t: (json.dumps({"model": model, "response": t, "done": False}) + "\n").encode(),
+                    lambda n: (json.dumps({"model": model, "response": "", "done": True,
+                                           "eval_count": n}) + "\n").encode())
+
+            def _llamacpp_completion(self, data):
+                server.count("requests")
+                limit = data.get("n_predict", data.get("max_tokens", 128))
+                tokens = server.generate(limit, data.get("stop", []))
+                if not data.get("stream", False):
+                    text = "".join(tokens)
+                    server.count("tokens", len(text.split()))
+                    self._send_json({"content": text, "stop": True, "tokens_predicted": len(text.split())})
+                    return
+                self._stream(
+                    "text/event-stream", tokens,
+                    lambda t: f"data: {json.dumps({'content': t, 'stop': False})}\n\n".encode(),
+                    lambda n: f"data: {json.dumps({'content': '', 'stop': True, 'tokens_predicted': n})}\n\n".encode())
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub Ollama / LLaMA.cpp server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--tokens-per-second", type=float, default=20.0)
+    parser.add_argument("--first-token-delay", type=float, default=0.2, help="Seconds of simulated prompt processing")
+    parser.add_argument("--model", action="append", help="Model name to advertise (repeatable)")
+    parser.add_argument("--load-delay", type=float, default=0.0, help="Seconds to 'load' an evicted model")
+    args = parser.parse_args()
+
+    server = StubLLMServer(args.host, args.port, args.tokens_per_second, args.first_token_delay,
+                           models=args.model or ["gemma3n:e2b"], load_delay=args.load_delay)
+    print(f"Stub LLM server on {server.base_url} ({args.tokens_per_second} tokens/s)")
+    print(f"   Ollama:    {server.base_url}/api/generate")
+    print(f"   LLaMA.cpp: {server.base_url}/completion")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopped")
+
+
+if __name__ == "__main__":
+    main()
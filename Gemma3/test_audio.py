@@ -10,6 +10,7 @@ import wave
 import tempfile
 import os
 import sys
+import importlib.util
 
 def test_audio_devices():
     """Test and list available audio devices"""
@@ -23,15 +24,15 @@ def test_audio_devices():
         print("\nInput devices:")
         input_devices = []
         for i, device in enumerate(devices):
-            if device['max_inputs'] > 0:
-                print(f"  {i}: {device['name']} (channels: {device['max_inputs']})")
+            if device['max_input_channels'] > 0:
+                print(f"  {i}: {device['name']} (channels: {device['max_input_channels']})")
                 input_devices.append(i)
         
         print("\nOutput devices:")
         output_devices = []
         for i, device in enumerate(devices):
-            if device['max_outputs'] > 0:
-                print(f"  {i}: {device['name']} (channels: {device['max_outputs']})")
+            if device['max_output_channels'] > 0:
+                print(f"  {i}: {device['name']} (channels: {device['max_output_channels']})")
                 output_devices.append(i)
         
         return input_devices, output_devices
@@ -109,11 +110,19 @@ def test_audio_libraries():
     
     return all_passed
 
-def test_whisper():
+def test_whisper(load_model=True):
     """Test Whisper installation"""
     print("\nTesting Whisper")
     print("=" * 20)
     
+    if not load_model:
+        # Quick mode: only check that the package is installed, importing it pulls in torch
+        if importlib.util.find_spec("whisper") is None:
+            print("✗ Whisper is not installed")
+            return False
+        print("✓ Whisper installed (model load skipped)")
+        return True
+    
     try:
         import whisper
         print("✓ Whisper imported successfully")
@@ -131,6 +140,8 @@ def test_whisper():
 
 def main():
     """Main test function"""
+    # --quick skips recording, playback and the Whisper model load (see also healthcheck.py)
+    quick = "--quick" in sys.argv[1:]
     print("Jetson Orin Nano Audio Test Suite")
     print("=" * 40)
     
@@ -142,20 +153,24 @@ def main():
     
     # Test microphone if available
     mic_ok = False
-    if input_devices:
+    if quick:
+        mic_ok = bool(input_devices)
+    elif input_devices:
         mic_ok = test_microphone()
     else:
         print("\nNo input devices found - skipping microphone test")
     
     # Test speakers if available
     speakers_ok = False
-    if output_devices:
+    if quick:
+        speakers_ok = bool(output_devices)
+    elif output_devices:
         speakers_ok = test_speakers()
     else:
         print("\nNo output devices found - skipping speaker test")
     
     # Test Whisper
-    whisper_ok = test_whisper()
+    whisper_ok = test_whisper(load_model=not quick)
     
     # Summary
     print("\n" + "=" * 40)